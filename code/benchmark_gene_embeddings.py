@@ -0,0 +1,62 @@
+import os
+import sys
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import time
+import numpy as np
+import pandas as pd
+import fire
+
+def main(k = 256, b = 32, t = 0):
+    # 对比逐个基因计算 (原实现) 与 batch 计算的速度, k: 基因数
+    # HF_ENDPOINT 需在导入 transformers 之前设置
+    os.environ["HF_ENDPOINT"] = "https://hf-mirror.com/"
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+
+    import geneembedding
+
+    gene_summary_dataset_filename = 'gene_summary.csv'
+    gene_summary_dataset_path = os.path.join(dir_data, gene_summary_dataset_filename)
+
+    if t > 0:
+        torch.set_num_threads(t)
+
+    gene_df = pd.read_csv(gene_summary_dataset_path, dtype = {'gene_symbol': 'string', 'gene_id': int, 'gene_summary': 'string', 'gene_search_error_code': int})
+    texts = [geneembedding.clean_summary(description) for description in gene_df.loc[gene_df['gene_search_error_code'] == 0, 'gene_summary']]
+    texts = [text for text in texts if text != ''][:k]
+
+    tokenizer = AutoTokenizer.from_pretrained("gpt2")
+    model = AutoModel.from_pretrained("gpt2")
+    model.eval()
+
+    start = time.perf_counter()
+    single = []
+    for text in texts:
+        # 与原实现相同: 没有 no_grad
+        inputs = tokenizer(text, return_tensors="pt")
+        outputs = model(**inputs)
+        single.append(outputs.last_hidden_state.mean(dim=1).detach().numpy()[0])
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = [None] * len(texts)
+    for batch, embeddings in geneembedding.embed_texts_batched(tokenizer, model, texts, batch_size = b):
+        for i, embedding in zip(batch, embeddings):
+            batched[i] = embedding
+    batched_time = time.perf_counter() - start
+
+    print(f"genes: {len(texts)}, batch size: {b}, threads: {torch.get_num_threads()}")
+    print(f"per-gene: {len(texts) / single_time:.2f} genes/s")
+    print(f"batched:  {len(texts) / batched_time:.2f} genes/s ({single_time / batched_time:.1f}x)")
+    print(f"max abs diff: {np.abs(np.stack(single) - np.stack(batched)).max():.2e}")
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import time
+import pickle
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import numpy as np
+import fire
+
+import simsearch
+
+def clustered_vectors(n, d, n_clusters, seed):
+    """Unit vectors around `n_clusters` random centres, a stand-in for gene embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, d), dtype=np.float32)
+    vectors = centres[rng.integers(n_clusters, size=n)] + 0.5 * rng.standard_normal((n, d), dtype=np.float32)
+    return simsearch.normalize(vectors)
+
+def recall(ids, truth):
+    """Mean fraction of the exact top-k found, per query."""
+    return float(np.mean([len(np.intersect1d(a[a >= 0], b)) / len(b) for a, b in zip(ids, truth)]))
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main(n = 20000, d = 768, q = 500, k = 10, nlist = None, nprobes = '1,4,16', m = 32, source = None, seed = 0, output = None):
+    # n, d: 合成数据的向量数与维度, q: 查询数, k: 近邻数, nlist: IVF 簇数 (默认 4 * sqrt(n)), nprobes: 逗号分隔的 nprobe 列表
+    # m: PQ 子空间数 (0 表示不测 IVF-PQ), source: 嵌入 pickle ({gene: vector}, 如 data/gene_embeddings.pkl), 给定时不用合成数据
+    if source is not None:
+        with open(source, 'rb') as file:
+            _, vectors = simsearch.embedding_matrix(pickle.load(file))
+        vectors = simsearch.normalize(vectors)
+    else:
+        vectors = clustered_vectors(n, d, max(n // 200, 1), seed)
+    n, d = vectors.shape
+    rng = np.random.default_rng(seed + 1)
+    queries = vectors[rng.choice(n, min(q, n), replace = False)]
+    nprobes = [int(x) for x in str(nprobes).split(',')] if isinstance(nprobes, str) else list(nprobes)
+    print(f"database: {n} x {d}, queries: {len(queries)}, k: {k}")
+
+    exact, build_seconds = timed(simsearch.ExactIndex, vectors)
+    (_, truth), query_seconds = timed(exact.search, queries, k)
+    results = [{'index': 'exact', 'nprobe': None, 'build_seconds': build_seconds, 'query_seconds': query_seconds,
+                'queries_per_second': len(queries) / query_seconds, 'recall': 1.0, 'index_mb': exact.nbytes() / (1 << 20)}]
+
+    variants = [('ivf-flat', None)] + ([(f'ivf-pq{m}', m)] if m else [])
+    for name, pq_m in variants:
+        index, build_seconds = timed(simsearch.IVFIndex, vectors, nlist = nlist, pq_m = pq_m, seed = seed)
+        for nprobe in nprobes:
+            index.nprobe = nprobe
+            (_, ids), query_seconds = timed(index.search, queries, k)
+            results.append({'index': name, 'nprobe': nprobe, 'build_seconds': build_seconds, 'query_seconds': query_seconds,
+                            'queries_per_second': len(queries) / query_seconds, 'recall': recall(ids, truth),
+                            'index_mb': index.nbytes() / (1 << 20)})
+
+    for row in results:
+        nprobe = '' if row['nprobe'] is None else row['nprobe']
+        print(f"{row['index']:<10}nprobe {nprobe:<4}build {row['build_seconds']:>7.2f}s  {row['queries_per_second']:>9.0f} q/s  "
+              f"recall@{k} {row['recall']:.3f}  index {row['index_mb']:>7.1f} MB")
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump({'n': n, 'd': d, 'queries': len(queries), 'k': k, 'results': results}, file, indent = 1)
+
+if __name__ == "__main__":
+    fire.Fire(main)
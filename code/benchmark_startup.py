@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import fire
+
+import pipeline
+
+# 在新进程中以非 __main__ 的名字执行脚本源码: 只计入模块级代码 (import 及其副作用), 不运行 main
+LOADER = '''
+import sys, time
+path, source = sys.argv[1], sys.argv[2]
+code = compile(open(source).read(), path, 'exec')
+start = time.perf_counter()
+exec(code, {'__name__': '__startup_benchmark__', '__file__': path})
+print(time.perf_counter() - start)
+'''
+
+def measure(path, source, repeat):
+    """(import seconds, process seconds, peak RSS MB, ok) of loading `source` as the script at `path`."""
+    import_times, process_times, peaks = [], [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'out.log')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            returncode, peak = pipeline.run_process([sys.executable, '-c', LOADER, path, source], log_path, cwd = project_dir)
+            process_times.append(time.perf_counter() - start)
+            if returncode != 0:
+                return None, min(process_times), peak, False
+            with open(log_path) as file:
+                import_times.append(float(file.read().split()[-1]))
+            peaks.append(peak)
+    return min(import_times), min(process_times), max(peaks) if None not in peaks else None, True
+
+def script_source(name, ref, tmp):
+    """Path of the source of code/<name> at git revision `ref` (the working tree if None)."""
+    if ref is None:
+        return os.path.join(dir_code, name)
+    source = os.path.join(tmp, name)
+    with open(source, 'wb') as file:
+        file.write(subprocess.run(['git', 'show', f'{ref}:code/{name}'], cwd = project_dir, capture_output = True, check = True).stdout)
+    return source
+
+def main(scripts = None, ref = None, r = 3, output = None):
+    # scripts: 逗号分隔的脚本名 (默认 code/ 下全部), ref: 对比的 git 版本 (如 HEAD~1), r: 重复次数取最好值, output: 结果 json
+    # 注意: 旧版本中在 import 时就完成全部工作的脚本会真的运行一遍
+    if scripts is None:
+        names = sorted(name for name in os.listdir(dir_code) if name.endswith('.py') and name != os.path.basename(__file__))
+    else:
+        names = [name if name.endswith('.py') else name + '.py' for name in (scripts.split(',') if isinstance(scripts, str) else scripts)]
+
+    baseline = measure(os.path.join(dir_code, '__baseline__.py'), os.devnull, r)
+    print(f'bare interpreter: {baseline[1]:.2f}s, {baseline[2]:.0f} MB')
+
+    versions = ['current'] if ref is None else [ref, 'current']
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            for version in versions:
+                import_seconds, process_seconds, peak, ok = measure(os.path.join(dir_code, name), script_source(name, None if version == 'current' else version, tmp), r)
+                results.append({'script': name, 'version': version, 'ok': ok, 'import_seconds': import_seconds,
+                                'process_seconds': process_seconds, 'peak_rss_mb': peak})
+                row = f'{name:<32}{version:<10}'
+                if ok:
+                    row += f'import {import_seconds:>6.2f}s  process {process_seconds:>6.2f}s  peak RSS {peak:>6.0f} MB'
+                else:
+                    row += f'failed at import (process {process_seconds:.2f}s)'
+                print(row)
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump({'baseline': {'process_seconds': baseline[1], 'peak_rss_mb': baseline[2]}, 'scripts': results}, file, indent = 1)
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import fire
+
+import benchsuite
+
+def split(value):
+    return value.split(',') if isinstance(value, str) else value
+
+def main(scales = 'small', stages = None, r = 1, seed = 0, output = None, baseline = None, current = None, threshold = 0.1, work_dir = None):
+    # scales: small,medium,full; stages: 逗号分隔的阶段名 (默认全部); r: 重复次数取最好值
+    # output: 结果 json; baseline: 与之对比的结果 json; current: 给出时不运行, 只对比 current 与 baseline
+    # threshold: 慢于 baseline 超过该比例时标记; work_dir: 合成数据目录 (默认临时目录, 运行后删除)
+    if current is not None:
+        results = benchsuite.load_results(current)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = benchsuite.run_suite(project_dir, work_dir or tmp, scales = split(scales), stages = split(stages), repeat = r, seed = seed)
+        if output is not None:
+            benchsuite.write_results(results, output)
+            print(f'Results are written to {output}')
+
+    if baseline is None:
+        return
+    rows = benchsuite.compare(benchsuite.load_results(baseline), results, threshold = threshold)
+    for row in rows:
+        flags = ' '.join(flag for flag, on in (('SLOWER', row['slower']), ('MORE-MEMORY', row['more_memory'])) if on)
+        memory = f"{row['memory_ratio']:.2f}x" if row['memory_ratio'] is not None else '-'
+        print(f"{row['scale']:<8}{row['stage']:<27}{row['baseline_seconds']:>8.2f}s -> {row['seconds']:>8.2f}s  time {row['time_ratio']:.2f}x  memory {memory:>6}  {flags}")
+    if any(row['slower'] or row['more_memory'] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import fire
+
+import embstore
+
+def main(src, dst = None, key_type = None):
+    # 将 pkl / npz 格式的 embedding 转换为 embstore 目录, 默认输出到同名 .store 目录
+    if dst is None:
+        dst = os.path.splitext(src)[0] + '.store'
+
+    if src.endswith('.npz'):
+        store = embstore.from_npz(src, dst, key_type = key_type or 'str')
+    else:
+        store = embstore.from_pickle(src, dst, key_type = key_type)
+
+    print(f'{src} -> {dst}')
+    print(f'keys: {len(store)}, dim: {store.dim}, key type: {store.key_type}')
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -9,54 +9,50 @@ dir_data = os.path.join(project_dir, 'data')
 
 sys.path.append(dir_module)
 
-os.environ["HF_ENDPOINT"] = "https://hf-mirror.com/"
-
-import torch
 import numpy as np
 import pandas as pd
 import pickle
 import fire
-import signal
-import re
-
-from transformers import AutoTokenizer, AutoModel
-
-gene_embeddings_dataset_filename = 'gene_embeddings.pkl'
-gene_expression_dataset_filename = 'gene_expression.csv'
-cell_embeddings_dataset_filename = 'cell_embeddings_genePT-w.pkl'
-cell_line_set_dataset_filename = 'cell_line_set.csv'
-gene_embeddings_dataset_path = os.path.join(dir_data, gene_embeddings_dataset_filename)
-gene_expression_dataset_path = os.path.join(dir_data, gene_expression_dataset_filename)
-cell_embeddings_dataset_path = os.path.join(dir_data, cell_embeddings_dataset_filename)
-cell_line_set_dataset_path = os.path.join(dir_data, cell_line_set_dataset_filename)
-
-gene_expression_df = pd.read_csv(gene_expression_dataset_path)
-cell_line_df = pd.read_csv(cell_line_set_dataset_path, dtype = {'cell_line_origin': 'string', 'cell_line_gene_num': int})
-
-with open(gene_embeddings_dataset_path, 'rb') as file:
-    gene_embeddings:dict = pickle.load(file)
-    
-cell_embeddings_genePT_w = {}
-
-default_embeddings = np.zeros_like(list(gene_embeddings.values())[0])
-
-print('Dim embeddings: ', len(default_embeddings))
-
-for cell_line in cell_line_df.loc[:, 'cell_line_origin']:
-    cell_embeddings_genePT_w[cell_line] = default_embeddings
-
-gene_expression_df.set_index('Description', inplace=True)
-
-for column in gene_expression_df.columns[1:]:
-    cell_embeddings_genePT_w[column] = default_embeddings
-    
-    for row in gene_expression_df.index:
-        try:
-            cell_embeddings_genePT_w[column] = cell_embeddings_genePT_w[column] + gene_expression_df.loc[row, column] * gene_embeddings[row]
-        except:
-            import pdb;pdb.set_trace()
-            
-    cell_embeddings_genePT_w[column] = cell_embeddings_genePT_w[column] / np.linalg.norm(cell_embeddings_genePT_w[column])
-        
-with open(cell_embeddings_dataset_path, 'wb') as file:
-    pickle.dump(cell_embeddings_genePT_w, file)
\ No newline at end of file
+
+import cellembedding
+
+def main(weighting = 'rpkm', chunk_size = None):
+
+    gene_embeddings_dataset_filename = 'gene_embeddings.pkl'
+    gene_expression_dataset_filename = 'gene_expression.csv'
+    cell_embeddings_dataset_filename = 'cell_embeddings_genePT-w.pkl'
+    cell_line_set_dataset_filename = 'cell_line_set.csv'
+    missing_genes_dataset_filename = 'cell_embeddings_missing_genes.csv'
+    gene_embeddings_dataset_path = os.path.join(dir_data, gene_embeddings_dataset_filename)
+    gene_expression_dataset_path = os.path.join(dir_data, gene_expression_dataset_filename)
+    cell_embeddings_dataset_path = os.path.join(dir_data, cell_embeddings_dataset_filename)
+    cell_line_set_dataset_path = os.path.join(dir_data, cell_line_set_dataset_filename)
+    missing_genes_dataset_path = os.path.join(dir_data, missing_genes_dataset_filename)
+
+    gene_expression_df = pd.read_csv(gene_expression_dataset_path, index_col = 'Description')
+    cell_line_df = pd.read_csv(cell_line_set_dataset_path, dtype = {'cell_line_origin': 'string', 'cell_line_gene_num': int})
+
+    with open(gene_embeddings_dataset_path, 'rb') as file:
+        gene_embeddings:dict = pickle.load(file)
+
+    default_embeddings = np.zeros_like(next(iter(gene_embeddings.values())), dtype = np.float32)
+
+    print('Dim embeddings: ', len(default_embeddings))
+
+    # 没有表达数据的细胞系使用零向量
+    cell_embeddings_genePT_w = {cell_line: default_embeddings for cell_line in cell_line_df.loc[:, 'cell_line_origin']}
+
+    cell_embeddings, missing_genes = cellembedding.compute_cell_embeddings(gene_expression_df, gene_embeddings, weighting = weighting, chunk_size = chunk_size)
+    cell_embeddings_genePT_w.update(cell_embeddings)
+
+    print(f'cell line: {len(cell_embeddings)}/{cell_line_df.shape[0]}')
+    print(f'gene without embeddings: {len(missing_genes)}/{gene_expression_df.shape[0]}')
+    if missing_genes:
+        print(f'Missing genes are written to {missing_genes_dataset_path}')
+        pd.DataFrame({'gene_symbol': missing_genes}).to_csv(missing_genes_dataset_path, index = False)
+
+    with open(cell_embeddings_dataset_path, 'wb') as file:
+        pickle.dump(cell_embeddings_genePT_w, file)
+
+if __name__ == "__main__":
+    fire.Fire(main)
\ No newline at end of file
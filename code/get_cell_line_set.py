@@ -10,46 +10,51 @@ dir_data = os.path.join(project_dir, 'data')
 sys.path.append(dir_module)
 
 import pandas as pd
+import fire
 
-sl_data_filename = 'SLKB_rawSL.csv'
-cell_line_set_dataset_filename = 'cell_line_set.csv'
+def read_sl_data(sl_data_path):
+    return pd.read_csv(sl_data_path, dtype = \
+        {"gene_pair": 'string', 
+         "study_origin": int, 
+         "cell_line_origin": 'string', 
+         "gene_1": 'string', 
+         "gene_2": 'string', 
+         "SL_or_not": 'string', 
+         "SL_score": float, 
+         "statistical_score": float, 
+         "SL_score_cutoff": float, 
+         "statistical_score_cutoff": float}
+        )
 
-sl_data_path = os.path.join(dir_data, sl_data_filename)
-cell_line_set_dataset_path = os.path.join(dir_data, cell_line_set_dataset_filename)
+def cell_line_set_frame(SL_data):
+    """Cell lines sorted by name with their number of SL rows, as the cell_line_set.csv table."""
+    cell_line_dict = {}
 
-SL_data = pd.read_csv(sl_data_path, dtype = \
-    {"gene_pair": 'string', 
-     "study_origin": int, 
-     "cell_line_origin": 'string', 
-     "gene_1": 'string', 
-     "gene_2": 'string', 
-     "SL_or_not": 'string', 
-     "SL_score": float, 
-     "statistical_score": float, 
-     "SL_score_cutoff": float, 
-     "statistical_score_cutoff": float}
-    )
+    for cell_line in SL_data['cell_line_origin']:
+        cell_line_dict[cell_line] = cell_line_dict.get(cell_line, 0) + 1
 
-cell_line_dict = {}
+    cell_line_list, cell_line_num_list = zip(*sorted(cell_line_dict.items(), key=lambda x: x[0]))
 
-for cell_line in SL_data['cell_line_origin']:
-    cell_line_dict[cell_line] = cell_line_dict.get(cell_line, 0) + 1
-    
-print('Cell line Length:', len(cell_line_dict))
+    cell_line_df = pd.DataFrame({
+        'cell_line_origin': cell_line_list,
+        'cell_line_gene_num': cell_line_num_list
+    })
 
-cell_line_list = []
-cell_line_num_list = []
-for cell_line, cell_line_num in cell_line_dict.items():
-    cell_line_list.append(cell_line)
-    cell_line_num_list.append(cell_line_num)
+    return cell_line_df.astype({'cell_line_origin': 'string', 'cell_line_gene_num': 'int'})
 
-cell_line_list, cell_line_num_list = zip(*sorted(zip(cell_line_list, cell_line_num_list), key=lambda x: x[0]))
+def main():
 
-cell_line_df = pd.DataFrame({
-    'cell_line_origin': cell_line_list,
-    'cell_line_gene_num': cell_line_num_list
-})
+    sl_data_filename = 'SLKB_rawSL.csv'
+    cell_line_set_dataset_filename = 'cell_line_set.csv'
 
-cell_line_df = cell_line_df.astype({'cell_line_origin': 'string', 'cell_line_gene_num': 'int'})
+    sl_data_path = os.path.join(dir_data, sl_data_filename)
+    cell_line_set_dataset_path = os.path.join(dir_data, cell_line_set_dataset_filename)
 
-cell_line_df.to_csv(cell_line_set_dataset_path, index=False)
\ No newline at end of file
+    cell_line_df = cell_line_set_frame(read_sl_data(sl_data_path))
+
+    print('Cell line Length:', cell_line_df.shape[0])
+
+    cell_line_df.to_csv(cell_line_set_dataset_path, index=False)
+
+if __name__ == "__main__":
+    fire.Fire(main)
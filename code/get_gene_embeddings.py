@@ -9,18 +9,32 @@ dir_data = os.path.join(project_dir, 'data')
 
 sys.path.append(dir_module)
 
-os.environ["HF_ENDPOINT"] = "https://hf-mirror.com/"
-
-import torch
 import numpy as np
 import pandas as pd
 import pickle
 import fire
 import signal
 
-from transformers import AutoTokenizer, AutoModel
+import instrument
+
+def load_log(gene_embeddings_log):
+    """Return the set of finished row indices, converting the old [next, *skipped] log."""
+    if isinstance(gene_embeddings_log, dict):
+        return set(gene_embeddings_log['done'])
+    return set(range(gene_embeddings_log[0])) - set(gene_embeddings_log[1:])
+
+def main(n = False, l = 36000, b = 32, t = 0, save_every = 20, log = None, profile = None):
+    # b: batch size (b <= 1 为逐个基因计算), t: torch 线程数 (0 为默认), save_every: 每多少个 batch 保存一次
+    # log: 进度事件的 JSONL 路径, profile: 采样 profiler 的输出目录 (None 不启用)
+    instrument.configure(log, sample_interval = 5.0 if log else None, profile_dir = profile)
+
+    # torch / transformers 只在真正计算 embedding 时导入
+    # HF_ENDPOINT 需在导入 transformers 之前设置
+    os.environ["HF_ENDPOINT"] = "https://hf-mirror.com/"
+    import torch
+    from transformers import AutoTokenizer, AutoModel
 
-def main(n = False, l = 36000):
+    import geneembedding
 
     gene_summary_dataset_filename = 'gene_summary.csv'
     gene_embeddings_dataset_filename = 'gene_embeddings.pkl'
@@ -35,19 +49,21 @@ def main(n = False, l = 36000):
         with open(gene_embeddings_dataset_path, 'rb') as file:
             gene_embeddings = pickle.load(file)
         with open(gene_embeddings_log_dataset_path, 'rb') as file:
-            gene_embeddings_log = pickle.load(file)
+            gene_done = load_log(pickle.load(file))
     else:
         gene_embeddings = {}
-        gene_embeddings_log = [0]
+        gene_done = set()
     
     def saving_file():
-        print("Saving file and exiting...")
+        print("Saving file...")
         print(f"embeddings length: {len(gene_embeddings)}")
-        print(f"Rest of gene_embeddings: {gene_embeddings_log[1:]}, [{gene_embeddings_log[0]}:{gene_df['gene_symbol'].shape[0]}]")
-        with open(gene_embeddings_dataset_path, 'wb') as file:
-            pickle.dump(gene_embeddings, file)
-        with open(gene_embeddings_log_dataset_path, 'wb') as file:
-            pickle.dump(gene_embeddings_log, file)
+        print(f"Rest of gene_embeddings: {gene_df.shape[0] - len(gene_done)}")
+        # 先写临时文件再替换, 中断时不会留下损坏的 pkl
+        for path, obj in ((gene_embeddings_dataset_path, gene_embeddings), 
+                          (gene_embeddings_log_dataset_path, {'done': sorted(gene_done)})):
+            with open(path + '.tmp', 'wb') as file:
+                pickle.dump(obj, file)
+            os.replace(path + '.tmp', path)
     
     def signal_handler(signum, frame):
         saving_file()
@@ -62,72 +78,49 @@ def main(n = False, l = 36000):
     
     sys.excepthook = exception_handler
 
-    # 初始化 GPT-3.5 模型和分词器
-    tokenizer = AutoTokenizer.from_pretrained("gpt2")
-    model = AutoModel.from_pretrained("gpt2")
-    hidden_size = model.config.hidden_size
-    # 创建一个零张量，维度为 (hidden_size,)
-    default_embedding = torch.zeros(hidden_size)
-
-    def get_description_str(description):
-        if pd.isna(description):
-            return ""
-        else:
-            return description
-
-    def remove_brace(description:str):
-        des_list = description.split('[')
-        return des_list[0]
+    if t > 0:
+        torch.set_num_threads(t)
 
+    # 初始化 GPT-2 模型和分词器
+    with instrument.stage('load_model'):
+        tokenizer = AutoTokenizer.from_pretrained("gpt2")
+        model = AutoModel.from_pretrained("gpt2")
+        model.eval()
+    hidden_size = model.config.hidden_size
+    # 创建一个零向量，维度为 (hidden_size,)
+    default_embedding = np.zeros(hidden_size, dtype = np.float32)
 
+    # 检索失败的基因不写入 log, 之后获得 summary 时会重新计算
+    todo = [i for i in range(gene_df.shape[0]) if i not in gene_done and gene_df['gene_search_error_code'].iloc[i] == 0][:l]
+    texts = [geneembedding.clean_summary(gene_df['gene_summary'].iloc[i]) for i in todo]
+    genes = [gene_df['gene_symbol'].iloc[i] for i in todo]
 
+    for gene_index, gene, text in zip(todo, genes, texts):
+        if text == '':
+            gene_embeddings[gene] = default_embedding
+            gene_done.add(gene_index)
 
-    gene_embeddings_log_list = gene_embeddings_log[1:] + [i for i in range(gene_embeddings_log[0], gene_df.shape[0])]
-    log_start = gene_embeddings_log[0]
+    todo_text = [k for k, text in enumerate(texts) if text != '']
+    print(f"Gene to embed: {len(todo_text)}")
 
-    gene_n = 0
-    
-    for gene_index, gene, error_code, description in zip(gene_embeddings_log_list, 
-                                                         gene_df['gene_symbol'].iloc[gene_embeddings_log_list], 
-                                                        gene_df['gene_search_error_code'].iloc[gene_embeddings_log_list], 
-                                                        gene_df['gene_summary'][gene_embeddings_log_list]):
-        
-        
-        if error_code != 0:
-            description_n = ''
-            if gene_index >= log_start:
-                gene_embeddings_log.append(gene_index)
-                gene_embeddings_log[0] = gene_embeddings_log[0] + 1
-            continue
-        
-        else:
-            description_n = description
-            if gene_index < log_start:
-                gene_embeddings_log.remove(gene_index)
-        
-        try:
-            description_str = get_description_str(description_n)
-            description_clear = remove_brace(description_str)
-            
-            if description_clear == '':
-                gene_embeddings[gene] = default_embedding.numpy()
-            else:
-                inputs = tokenizer(description_clear, return_tensors="pt")
-                outputs = model(**inputs)
-                gene_embeddings[gene] = outputs.last_hidden_state.mean(dim=1).detach().numpy()[0]
-                
-        except:
-            print('Type of description:', type(description_n))
-            print('description:', description_n)
-            exit(0)
-            
-        print(f"Gene({gene}): ", gene_embeddings[gene][0:5])
-        gene_embeddings_log[0] = gene_embeddings_log[0] + 1
-        gene_n = gene_n + 1
-        if gene_n > l:
-            break
+    if b <= 1:
+        batches = ((np.array([j]), geneembedding.embed_text(tokenizer, model, texts[k])[None, :]) for j, k in enumerate(todo_text))
+    else:
+        batches = geneembedding.embed_texts_batched(tokenizer, model, [texts[k] for k in todo_text], batch_size = b)
+
+    genes_counter = instrument.counter('genes', 'genes')
+    with instrument.stage('embed', genes = len(todo_text), batch_size = b):
+        for batch_n, (batch, embeddings) in enumerate(batches):
+            for j, embedding in zip(batch, embeddings):
+                k = todo_text[j]
+                gene_embeddings[genes[k]] = embedding
+                gene_done.add(todo[k])
+            genes_counter.add(len(batch))
+            if (batch_n + 1) % save_every == 0:
+                saving_file()
         
     saving_file()
+    instrument.close()
 
 if __name__ == "__main__":
     fire.Fire(main)
\ No newline at end of file
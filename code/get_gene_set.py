@@ -10,37 +10,46 @@ dir_data = os.path.join(project_dir, 'data')
 sys.path.append(dir_module)
 
 import pandas as pd
+import fire
 
-sl_data_filename = 'SLKB_rawSL.csv'
-gene_set_dataset_filename = 'gene_set.csv'
+def read_sl_data(sl_data_path):
+    return pd.read_csv(sl_data_path, dtype = \
+        {"gene_pair": 'string', 
+         "study_origin": int, 
+         "cell_line_origin": 'string', 
+         "gene_1": 'string', 
+         "gene_2": 'string', 
+         "SL_or_not": 'string', 
+         "SL_score": float, 
+         "statistical_score": float, 
+         "SL_score_cutoff": float, 
+         "statistical_score_cutoff": float}
+        )
 
-sl_data_path = os.path.join(dir_data, sl_data_filename)
-gene_set_dataset_path = os.path.join(dir_data, gene_set_dataset_filename)
+def gene_set_frame(SL_data):
+    """Sorted unique gene symbols of both pair columns, as the gene_set.csv table."""
+    gene_set = set()
 
-SL_data = pd.read_csv(sl_data_path, dtype = \
-    {"gene_pair": 'string', 
-     "study_origin": int, 
-     "cell_line_origin": 'string', 
-     "gene_1": 'string', 
-     "gene_2": 'string', 
-     "SL_or_not": 'string', 
-     "SL_score": float, 
-     "statistical_score": float, 
-     "SL_score_cutoff": float, 
-     "statistical_score_cutoff": float}
-    )
+    gene_set.update(SL_data['gene_1'])
+    gene_set.update(SL_data['gene_2'])
 
-gene_set = set()
+    gene_list = sorted(gene_set)
 
-gene_set.update(SL_data['gene_1'])
-gene_set.update(SL_data['gene_2'])
+    return pd.DataFrame(gene_list, columns = ['gene_symbol'], dtype = 'string')
 
-print('Gene Set Length:', len(gene_set))
+def main():
 
-gene_list = list(gene_set)
+    sl_data_filename = 'SLKB_rawSL.csv'
+    gene_set_dataset_filename = 'gene_set.csv'
 
-gene_list = sorted(gene_list)
+    sl_data_path = os.path.join(dir_data, sl_data_filename)
+    gene_set_dataset_path = os.path.join(dir_data, gene_set_dataset_filename)
 
-gene_df = pd.DataFrame(gene_list, columns = ['gene_symbol'], dtype = 'string')
+    gene_df = gene_set_frame(read_sl_data(sl_data_path))
 
-gene_df.to_csv(gene_set_dataset_path, index=False)
\ No newline at end of file
+    print('Gene Set Length:', gene_df.shape[0])
+
+    gene_df.to_csv(gene_set_dataset_path, index=False)
+
+if __name__ == "__main__":
+    fire.Fire(main)
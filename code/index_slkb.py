@@ -0,0 +1,40 @@
+import os
+import sys
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import fire
+
+import slkbindex
+
+def main(chunksize = 200000):
+    # 一次扫描 SLKB, 同时生成 gene_set.csv, cell_line_set.csv 和按细胞系分组的 pair 表
+
+    sl_data_filename = 'SLKB_rawSL.csv'
+    gene_set_dataset_filename = 'gene_set.csv'
+    cell_line_set_dataset_filename = 'cell_line_set.csv'
+    sl_pairs_dataset_filename = 'sl_pairs.npz'
+
+    sl_data_path = os.path.join(dir_data, sl_data_filename)
+    gene_set_dataset_path = os.path.join(dir_data, gene_set_dataset_filename)
+    cell_line_set_dataset_path = os.path.join(dir_data, cell_line_set_dataset_filename)
+    sl_pairs_dataset_path = os.path.join(dir_data, sl_pairs_dataset_filename)
+
+    gene_df, cell_line_df, sl_pairs = slkbindex.index_slkb(sl_data_path, chunksize = chunksize)
+
+    print('Gene Set Length:', gene_df.shape[0])
+    print('Cell line Length:', cell_line_df.shape[0])
+    print('SL pairs:', len(sl_pairs))
+
+    gene_df.to_csv(gene_set_dataset_path, index=False)
+    cell_line_df.to_csv(cell_line_set_dataset_path, index=False)
+    sl_pairs.save(sl_pairs_dataset_path)
+
+if __name__ == "__main__":
+    fire.Fire(main)
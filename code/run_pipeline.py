@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+dir_now = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(dir_now)
+dir_module = os.path.join(project_dir, 'module')
+dir_code = os.path.join(project_dir, 'code')
+dir_data = os.path.join(project_dir, 'data')
+
+sys.path.append(dir_module)
+
+import fire
+
+import pipeline
+
+def data(filename):
+    return os.path.join(dir_data, filename)
+
+def code(filename):
+    return os.path.join(dir_code, filename)
+
+def module(name):
+    return os.path.join(dir_module, name)
+
+# 基因一侧: gene_set -> gene_info -> gene_embeddings; 细胞系一侧: cell_line_set -> expression
+# 两侧互不依赖, 可以并行; 只有 expression (需要 gene_set) 和 cell_line_embeddings 汇合
+# deps: 脚本导入的 module 包, 其代码改动后阶段同样需要重跑
+STAGES = [
+    pipeline.Stage('gene_set', code('get_gene_set.py'),
+                   inputs=[data('SLKB_rawSL.csv')], outputs=[data('gene_set.csv')]),
+    pipeline.Stage('gene_info', code('get_gene_info.py'),
+                   inputs=[data('gene_set.csv')], outputs=[data('gene_summary.csv')],
+                   deps=[module('genesearch'), module('instrument')]),
+    pipeline.Stage('gene_embeddings', code('get_gene_embeddings.py'),
+                   inputs=[data('gene_summary.csv')], outputs=[data('gene_embeddings.pkl')],
+                   deps=[module('geneembedding'), module('instrument')]),
+    pipeline.Stage('cell_line_set', code('get_cell_line_set.py'),
+                   inputs=[data('SLKB_rawSL.csv')], outputs=[data('cell_line_set.csv')]),
+    pipeline.Stage('expression', code('get_expression.py'),
+                   inputs=[data('CCLE_RNAseq_genes_rpkm_20180929.gct'), data('gene_set.csv'), data('cell_line_set.csv')],
+                   outputs=[data('gene_expression.csv')], deps=[module('gctio')]),
+    pipeline.Stage('cell_line_embeddings', code('get_cell_line_embeddings.py'),
+                   inputs=[data('gene_embeddings.pkl'), data('gene_expression.csv'), data('cell_line_set.csv')],
+                   outputs=[data('cell_embeddings_genePT-w.pkl')], deps=[module('cellembedding')]),
+]
+
+def main(stages = None, force = None, w = 2, dry_run = False):
+    # stages: 只运行这些阶段 (及其上游), force: 强制重跑的阶段, w: 并行的阶段数, 逗号分隔
+    targets = stages.split(',') if isinstance(stages, str) else stages
+    forced = force.split(',') if isinstance(force, str) else (force or ())
+
+    runner = pipeline.Pipeline(STAGES, state_path = data('pipeline_state.json'), log_dir = data('pipeline_logs'), cwd = project_dir)
+    for name in list(targets or ()) + list(forced):
+        if name not in runner.stages:
+            raise ValueError(f'Unknown stage: {name}, expected one of {list(runner.stages)}')
+
+    if dry_run:
+        for stage in STAGES:
+            print(f'{stage.name}: {"stale" if stage.name in forced or runner.is_stale(stage) else "up to date"}')
+        return
+
+    start = time.perf_counter()
+    report = runner.run(targets, force = forced, workers = w)
+    total = time.perf_counter() - start
+    pipeline.write_report(report, data('pipeline_report.json'), total)
+
+    for row in report:
+        peak = f"{row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else '-'
+        print(f"{row['stage']:<22}{row['status']:<9}{row['seconds']:>9.1f}s{peak:>10}")
+    print(f'Total: {total:.1f}s, report: {data("pipeline_report.json")}')
+    if any(row['status'] in ('failed', 'blocked') for row in report):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    fire.Fire(main)
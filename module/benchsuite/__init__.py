@@ -0,0 +1,3 @@
+from ._core import *
+from .synthetic import *
+from .stages import *
\ No newline at end of file
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+
+import pipeline
+
+from .synthetic import make_dataset
+
+# 在新进程中运行 stages.py 里的一个函数, 最后一行输出其返回值 (json)
+STAGE_LOADER = '''
+import sys, json
+sys.path.append(sys.argv[1])
+import benchsuite
+result = benchsuite.STAGE_FUNCTIONS[sys.argv[2]](sys.argv[3], json.loads(sys.argv[4]), sys.argv[5])
+print(json.dumps(result))
+'''
+
+class BenchStage:
+    """A timed step: `command(work_dir, data_dir, meta)` gives the process to run.
+
+    Throughput is `meta[items]` per second, in `unit`.
+    """
+
+    def __init__(self, name, command, items, unit):
+        self.name = name
+        self.command = command
+        self.items = items
+        self.unit = unit
+
+def _script(filename, *args):
+    return lambda work_dir, data_dir, meta: [sys.executable, os.path.join(work_dir, 'code', filename)] + list(args)
+
+def _function(name, project_dir):
+    module_dir = os.path.join(project_dir, 'module')
+    return lambda work_dir, data_dir, meta: [sys.executable, '-c', STAGE_LOADER, module_dir, name, data_dir, json.dumps(meta), project_dir]
+
+def default_stages(project_dir):
+    """Every data script in pipeline order, file_generate.py, then the notebook's PPI, pair feature and AE steps (full and PCA-reduced width)."""
+    return [
+        BenchStage('gene_set', _script('get_gene_set.py'), 'sl_rows', 'rows'),
+        BenchStage('cell_line_set', _script('get_cell_line_set.py'), 'sl_rows', 'rows'),
+        BenchStage('expression', _script('get_expression.py'), 'gct_rows', 'rows'),
+        BenchStage('cell_line_embeddings', _script('get_cell_line_embeddings.py'), 'cell_lines', 'cell lines'),
+        BenchStage('file_generate', lambda work_dir, data_dir, meta: [sys.executable, os.path.join(project_dir, 'file_generate.py'), '--all_cell_lines', '--data_dir', data_dir], 'sl_rows', 'rows'),
+        BenchStage('ppi_sgc', _function('ppi_sgc', project_dir), 'ppi_edges', 'edges'),
+        BenchStage('pair_features', _function('pair_features', project_dir), 'sl_rows', 'pairs'),
+        BenchStage('reduced_pair_features', _function('reduced_pair_features', project_dir), 'sl_rows', 'pairs'),
+        BenchStage('train_autoencoder', _function('train_autoencoder', project_dir), 'ae_sample_epochs', 'samples'),
+        BenchStage('train_autoencoder_reduced', _function('train_autoencoder_reduced', project_dir), 'ae_sample_epochs', 'samples'),
+    ]
+
+def prepare_workspace(work_dir, project_dir, scale, seed=0):
+    """Synthetic data in `<work_dir>/data` and copies of code/ next to it, so the scripts' dir_data points there."""
+    os.makedirs(work_dir, exist_ok=True)
+    shutil.copytree(os.path.join(project_dir, 'code'), os.path.join(work_dir, 'code'), dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    module_link = os.path.join(work_dir, 'module')
+    if not os.path.exists(module_link):
+        os.symlink(os.path.join(project_dir, 'module'), module_link)
+    start = time.perf_counter()
+    meta = make_dataset(os.path.join(work_dir, 'data'), scale, seed)
+    meta['ae_sample_epochs'] = meta['ae_samples'] * meta['ae_epochs']
+    return meta, time.perf_counter() - start
+
+def run_stage(stage, work_dir, meta, repeat=1):
+    """Run a stage `repeat` times; keep the fastest time and the largest peak RSS."""
+    data_dir = os.path.join(work_dir, 'data')
+    log_path = os.path.join(work_dir, f'{stage.name}.log')
+    seconds, peaks = [], []
+    for _ in range(repeat):
+        # id 索引缓存每次都重新构建, 计时可重复
+        if os.path.exists(os.path.join(data_dir, 'id_index.npz')) and stage.name == 'file_generate':
+            os.remove(os.path.join(data_dir, 'id_index.npz'))
+        start = time.perf_counter()
+        returncode, peak = pipeline.run_process(stage.command(work_dir, data_dir, meta), log_path, cwd=work_dir)
+        seconds.append(time.perf_counter() - start)
+        peaks.append(peak)
+        if returncode != 0:
+            return {'stage': stage.name, 'status': 'failed', 'returncode': returncode, 'seconds': seconds[-1], 'log': log_path}
+    items = meta[stage.items]
+    return {'stage': stage.name, 'status': 'ok', 'seconds': min(seconds), 'items': items, 'unit': stage.unit,
+            'throughput': items / min(seconds), 'peak_rss_mb': max(peaks) if None not in peaks else None}
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'commit': commit, 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+def run_suite(project_dir, work_root, scales=('small',), stages=None, repeat=1, seed=0, log=print):
+    """Generate each scale's data under `work_root/<scale>` and time the stages; return the results dict."""
+    selected = default_stages(project_dir)
+    if stages is not None:
+        unknown = set(stages) - {stage.name for stage in selected}
+        if unknown:
+            raise ValueError(f'Unknown stages: {sorted(unknown)}')
+        selected = [stage for stage in selected if stage.name in stages]
+
+    results = []
+    for scale in scales:
+        work_dir = os.path.join(work_root, scale)
+        meta, generate_seconds = prepare_workspace(work_dir, project_dir, scale, seed)
+        log(f'[{scale}] synthetic data in {generate_seconds:.1f}s: {meta}')
+        for stage in selected:
+            row = dict(scale=scale, **run_stage(stage, work_dir, meta, repeat))
+            results.append(row)
+            if row['status'] == 'ok':
+                peak = f"{row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else '-'
+                log(f"[{scale}] {stage.name:<27}{row['seconds']:>8.2f}s {row['throughput']:>12.1f} {stage.unit}/s {peak:>9}")
+            else:
+                log(f"[{scale}] {stage.name:<27}failed (return code {row['returncode']}), see {row['log']}")
+    return {'environment': environment(), 'seed': seed, 'repeat': repeat, 'results': results}
+
+def write_results(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=1)
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+def compare(baseline, current, threshold=0.1):
+    """Rows of (scale, stage) present in both runs with time / memory ratios.
+
+    `slower` is set when the current time exceeds the baseline by more
+    than `threshold` (relative); `more_memory` likewise for peak RSS.
+    """
+    previous = {(row['scale'], row['stage']): row for row in baseline['results'] if row['status'] == 'ok'}
+    rows = []
+    for row in current['results']:
+        before = previous.get((row['scale'], row['stage']))
+        if before is None or row['status'] != 'ok':
+            continue
+        time_ratio = row['seconds'] / before['seconds']
+        memory_ratio = row['peak_rss_mb'] / before['peak_rss_mb'] if row['peak_rss_mb'] and before['peak_rss_mb'] else None
+        rows.append({'scale': row['scale'], 'stage': row['stage'], 'baseline_seconds': before['seconds'], 'seconds': row['seconds'],
+                     'time_ratio': time_ratio, 'memory_ratio': memory_ratio, 'slower': time_ratio > 1 + threshold,
+                     'more_memory': memory_ratio is not None and memory_ratio > 1 + threshold})
+    return rows
@@ -0,0 +1,122 @@
+import os
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import EMBEDDING_DIMS
+
+def _load_pickle(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+def notebook_cell_namespace(notebook_path, marker, namespace=None):
+    """Execute the notebook code cell containing `marker` and return its namespace."""
+    with open(notebook_path, encoding='utf-8') as file:
+        cells = json.load(file)['cells']
+    sources = [''.join(cell['source']) for cell in cells if cell['cell_type'] == 'code']
+    matches = [source for source in sources if marker in source]
+    if len(matches) != 1:
+        raise ValueError(f'Expected one cell containing {marker!r} in {notebook_path}, found {len(matches)}')
+    namespace = {} if namespace is None else namespace
+    exec(compile(matches[0], notebook_path, 'exec'), namespace)
+    return namespace
+
+def ppi_sgc(data_dir, meta, project_dir):
+    """Notebook PPI path with PPI_MODE='sgc': NCBI -> symbol, graph, Geneformer features, Â^k X + PCA."""
+    import idmap
+    import ppigraph
+
+    id_index = idmap.load_or_build(data_dir)
+    ppi = pd.read_csv(os.path.join(data_dir, 'ppi.csv'))
+    ppi['symA'] = id_index.series(ppi['geneA_ID'], 'ncbi', 'symbol').to_numpy()
+    ppi['symB'] = id_index.series(ppi['geneB_ID'], 'ncbi', 'symbol').to_numpy()
+    ppi = ppi.dropna(subset=['symA', 'symB'])
+    graph = ppigraph.PPIGraph.from_frame(ppi, source='symA', target='symB')
+    x = graph.features(_load_pickle(os.path.join(data_dir, 'geneformer_gene_embs.pkl')), EMBEDDING_DIMS['geneformer'])
+    embeddings = ppigraph.sgc_embeddings(graph, x, k=2, dim=EMBEDDING_DIMS['ppi'])
+    return {'nodes': graph.num_nodes, 'shape': list(embeddings.shape)}
+
+def _pair_feature_builder(data_dir):
+    import pairfeature
+
+    rng = np.random.default_rng(0)
+    genes = pd.read_csv(os.path.join(data_dir, 'gene_set.csv'))['gene_symbol']
+    ppi_embeddings = dict(zip(genes, rng.standard_normal((len(genes), EMBEDDING_DIMS['ppi']), dtype=np.float32)))
+    genePT_emb = _load_pickle(os.path.join(data_dir, 'GenePT_gene_embedding_ada_text.pickle'))
+    return pairfeature.PairFeatureBuilder(
+        _load_pickle(os.path.join(data_dir, 'scgpt_emb.pkl')),
+        _load_pickle(os.path.join(data_dir, 'geneformer_gene_embs.pkl')),
+        _load_pickle(os.path.join(data_dir, 'gene_embeddings.pkl')),
+        genePT_emb, ppi_embeddings,
+        pd.read_csv(os.path.join(data_dir, 'gene_expression.csv'), index_col=0),
+        ppi_dim=EMBEDDING_DIMS['ppi'], gp_emb_dim=EMBEDDING_DIMS['genePT'],
+    )
+
+def _build_pair_features(builder, data_dir):
+    import idmap
+
+    id_index = idmap.load_or_build(data_dir)
+    sl_raw = pd.read_csv(os.path.join(data_dir, 'SLKB_rawSL.csv'))
+    sl_raw = sl_raw.rename(columns={'gene_1': 'geneA_ID', 'gene_2': 'geneB_ID'})
+    sl_raw['label'] = (sl_raw['SL_or_not'] == 'SL').astype(int)
+    sl_raw['geneA_scGPT_id'] = id_index.series(sl_raw['geneA_ID'], 'symbol', 'scgpt_protein').array
+    sl_raw['geneB_scGPT_id'] = id_index.series(sl_raw['geneB_ID'], 'symbol', 'scgpt_protein').array
+
+    checksum = 0.0
+    for _, cell_data in sl_raw.groupby('cell_line_origin', sort=True):
+        X, _ = builder.build(cell_data.reset_index(drop=True))
+        checksum += float(X[:, -2:].sum())
+    return {'n_features': builder.n_features(), 'checksum': checksum}
+
+def pair_features(data_dir, meta, project_dir):
+    """Build the pair features of every SL row, one cell line at a time as the CV cache does."""
+    return _build_pair_features(_pair_feature_builder(data_dir), data_dir)
+
+def reduced_pair_features(data_dir, meta, project_dir):
+    """Fit the per-table PCA from scratch, then build the pair features in the reduced space."""
+    import shutil
+    import pairfeature
+
+    cache_dir = os.path.join(data_dir, 'table_reduction')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    reduction = pairfeature.TableReduction(cache_dir)
+    result = _build_pair_features(reduction.apply(_pair_feature_builder(data_dir)), data_dir)
+    result['explained_variance'] = reduction.summary().set_index('block')['explained_variance'].to_dict()
+    return result
+
+def _train_autoencoder(meta, project_dir, feature_dim):
+    import torch
+    import instrument
+
+    namespace = notebook_cell_namespace(os.path.join(project_dir, 'only_autoencoder.ipynb'), 'def train_autoencoder',
+                                        {'torch': torch, 'nn': torch.nn, 'instrument': instrument})
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    n_val = max(meta['ae_samples'] // 8, 1)
+    X_train = rng.standard_normal((meta['ae_samples'], feature_dim), dtype=np.float32)
+    X_val = rng.standard_normal((n_val, feature_dim), dtype=np.float32)
+    autoencoder = namespace['ImprovedAutoEncoder'](feature_dim, 256)
+    namespace['train_autoencoder'](autoencoder, X_train, X_val, torch.device('cpu'), epochs=meta['ae_epochs'])
+    return {'parameters': sum(parameter.numel() for parameter in autoencoder.parameters())}
+
+def train_autoencoder(data_dir, meta, project_dir):
+    """The notebook's `train_autoencoder` on random features of the pair feature width."""
+    return _train_autoencoder(meta, project_dir, meta['feature_dim'])
+
+def train_autoencoder_reduced(data_dir, meta, project_dir):
+    """The same training on the width of pair features built with the default TableReduction dims."""
+    import pairfeature
+
+    dims = pairfeature.DEFAULT_DIMS
+    feature_dim = 2 * sum(dims[block] for block in ('scgpt', 'geneformer', 'gene_emb', 'genePT')) + dims['cell_emb'] + 2 * EMBEDDING_DIMS['ppi'] + 2
+    return _train_autoencoder(meta, project_dir, feature_dim)
+
+STAGE_FUNCTIONS = {
+    'ppi_sgc': ppi_sgc,
+    'pair_features': pair_features,
+    'reduced_pair_features': reduced_pair_features,
+    'train_autoencoder': train_autoencoder,
+    'train_autoencoder_reduced': train_autoencoder_reduced,
+}
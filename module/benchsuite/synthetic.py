@@ -0,0 +1,141 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# 维度与真实数据一致: scGPT 512, Geneformer 256, GPT-2 summary 768, GenePT (ada) 1536, PPI 64
+EMBEDDING_DIMS = {'scgpt': 512, 'geneformer': 256, 'gene_emb': 768, 'genePT': 1536, 'ppi': 64}
+
+# full 接近真实规模 (SLKB ~40 万行, CCLE ~5.6 万基因 x 1019 细胞系)
+SCALES = {
+    'small': dict(genes=1000, cell_lines=8, sl_rows=20000, gct_extra_genes=2000, gct_extra_cell_lines=40,
+                  ppi_edges=20000, ae_samples=2000, ae_epochs=2),
+    'medium': dict(genes=4000, cell_lines=16, sl_rows=100000, gct_extra_genes=10000, gct_extra_cell_lines=200,
+                   ppi_edges=150000, ae_samples=8000, ae_epochs=3),
+    'full': dict(genes=11000, cell_lines=25, sl_rows=400000, gct_extra_genes=45000, gct_extra_cell_lines=1000,
+                 ppi_edges=800000, ae_samples=30000, ae_epochs=5),
+}
+
+TISSUES = ['LUNG', 'BREAST', 'HAEMATOPOIETIC_AND_LYMPHOID_TISSUE', 'SKIN', 'LARGE_INTESTINE', 'PROSTATE', 'OVARY', 'CENTRAL_NERVOUS_SYSTEM']
+
+def gene_symbols(n):
+    return np.array([f'SYN{i:05d}' for i in range(n)], dtype=object)
+
+def cell_line_names(n, prefix='CL'):
+    # CCLE 列名为 <CELL>_<TISSUE>, 细胞系名中不能有下划线
+    return np.array([f'{prefix}{i:04d}' for i in range(n)], dtype=object)
+
+def pair_feature_dim():
+    """Width of the notebook's pair features built from the synthetic embeddings."""
+    gene_blocks = sum(EMBEDDING_DIMS.values())
+    return 2 * gene_blocks + EMBEDDING_DIMS['genePT'] + 2
+
+def random_embeddings(keys, dim, rng, coverage=1.0):
+    """{key: float32 vector} for a random `coverage` fraction of `keys`."""
+    keys = [key for key in keys if rng.random() < coverage]
+    vectors = rng.standard_normal((len(keys), dim), dtype=np.float32)
+    return dict(zip(keys, vectors))
+
+def write_pickle(path, obj):
+    with open(path, 'wb') as file:
+        pickle.dump(obj, file)
+
+def write_slkb(path, genes, cell_lines, n_rows, rng, sl_rate=0.1):
+    """SLKB_rawSL.csv with the original columns; gene and cell line frequencies are skewed like the real table."""
+    gene_weights = 1.0 / np.arange(1, len(genes) + 1) ** 0.6
+    gene_weights /= gene_weights.sum()
+    cell_weights = rng.dirichlet(np.full(len(cell_lines), 0.7))
+    gene_1 = genes[rng.choice(len(genes), n_rows, p=gene_weights)]
+    gene_2 = genes[rng.choice(len(genes), n_rows, p=gene_weights)]
+    sl = rng.random(n_rows) < sl_rate
+    sl_raw = pd.DataFrame({
+        'gene_pair': [f'{a}|{b}' for a, b in zip(gene_1, gene_2)],
+        'study_origin': rng.integers(1, 30, n_rows),
+        'cell_line_origin': cell_lines[rng.choice(len(cell_lines), n_rows, p=cell_weights)],
+        'gene_1': gene_1,
+        'gene_2': gene_2,
+        'SL_or_not': np.where(sl, 'SL', 'Not SL'),
+        'SL_score': np.round(rng.normal(0, 1, n_rows), 6),
+        'statistical_score': np.round(rng.random(n_rows), 6),
+        'SL_score_cutoff': -0.5,
+        'statistical_score_cutoff': 0.05,
+    })
+    sl_raw.to_csv(path, index=False)
+    return sl_raw
+
+def write_gct(path, genes, cell_lines, rng, chunk_size=5000):
+    """CCLE-style GCT: `#1.2`, dimensions, then Name / Description / `<CELL>_<TISSUE>` columns of rpkm values."""
+    columns = [f'{cell_line}_{TISSUES[i % len(TISSUES)]}' for i, cell_line in enumerate(cell_lines)]
+    with open(path, 'w') as file:
+        file.write('#1.2\n')
+        file.write(f'{len(genes)}\t{len(columns)}\n')
+        file.write('\t'.join(['Name', 'Description'] + columns) + '\n')
+        for start in range(0, len(genes), chunk_size):
+            block = genes[start:start + chunk_size]
+            values = np.round(rng.lognormal(0.5, 1.5, (len(block), len(columns))) * (rng.random((len(block), len(columns))) > 0.2), 3)
+            frame = pd.DataFrame(values, columns=columns)
+            frame.insert(0, 'Description', block)
+            frame.insert(0, 'Name', [f'ENSG{start + i:011d}.1' for i in range(len(block))])
+            frame.to_csv(file, sep='\t', header=False, index=False)
+    return len(genes), len(columns)
+
+def write_ppi(path, ncbi_ids, n_edges, rng):
+    """ppi.csv edge list of NCBI ids with a heavy-tailed degree distribution."""
+    weights = 1.0 / np.arange(1, len(ncbi_ids) + 1) ** 0.8
+    weights = rng.permutation(weights / weights.sum())
+    a = ncbi_ids[rng.choice(len(ncbi_ids), n_edges, p=weights)]
+    b = ncbi_ids[rng.choice(len(ncbi_ids), n_edges, p=weights)]
+    keep = a != b
+    pd.DataFrame({'geneA_ID': a[keep], 'geneB_ID': b[keep]}).to_csv(path, index=False)
+    return int(keep.sum())
+
+def make_dataset(data_dir, scale='small', seed=0):
+    """Write a seeded synthetic look-alike of data/ for `scale`; return its sizes.
+
+    Files: SLKB_rawSL.csv, the CCLE .gct, gene_set.csv, cell_line_set.csv,
+    the notebook's embedding pickles, the idmap sources (protein_info,
+    scgpt_gene2idx, dbid2name, entity2id) and ppi.csv.
+    """
+    config = SCALES[scale] if isinstance(scale, str) else scale
+    rng = np.random.default_rng(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    path = lambda filename: os.path.join(data_dir, filename)
+
+    genes = gene_symbols(config['genes'])
+    cell_lines = cell_line_names(config['cell_lines'])
+    sl_raw = write_slkb(path('SLKB_rawSL.csv'), genes, cell_lines, config['sl_rows'], rng)
+
+    # gene_set.csv / cell_line_set.csv 与 get_gene_set.py / get_cell_line_set.py 的输出相同
+    sl_genes = sorted(set(sl_raw['gene_1']) | set(sl_raw['gene_2']))
+    pd.DataFrame({'gene_symbol': sl_genes}).to_csv(path('gene_set.csv'), index=False)
+    counts = sl_raw['cell_line_origin'].value_counts().sort_index()
+    pd.DataFrame({'cell_line_origin': counts.index, 'cell_line_gene_num': counts.to_numpy()}).to_csv(path('cell_line_set.csv'), index=False)
+
+    # GCT 覆盖约 90% 的 SL 基因和全部 SL 细胞系, 其余为无关的行和列
+    gct_genes = np.concatenate([genes[rng.random(len(genes)) < 0.9], gene_symbols(config['genes'] + config['gct_extra_genes'])[config['genes']:]])
+    gct_cell_lines = np.concatenate([cell_lines, cell_line_names(config['gct_extra_cell_lines'], prefix='XL')])
+    gct_rows, gct_columns = write_gct(path('CCLE_RNAseq_genes_rpkm_20180929.gct'), rng.permutation(gct_genes), rng.permutation(gct_cell_lines), rng)
+
+    write_pickle(path('gene_embeddings.pkl'), random_embeddings(genes, EMBEDDING_DIMS['gene_emb'], rng, 0.95))
+    write_pickle(path('geneformer_gene_embs.pkl'), random_embeddings(genes, EMBEDDING_DIMS['geneformer'], rng, 0.8))
+    write_pickle(path('GenePT_gene_embedding_ada_text.pickle'), random_embeddings(genes, EMBEDDING_DIMS['genePT'], rng, 0.9))
+    scgpt_genes = genes[rng.random(len(genes)) < 0.85]
+    scgpt_ids = rng.permutation(len(scgpt_genes) * 2)[:len(scgpt_genes)]
+    pd.DataFrame({0: scgpt_genes, 1: scgpt_ids}).to_csv(path('scgpt_gene2idx.txt'), sep='\t', header=False, index=False)
+    write_pickle(path('scgpt_emb.pkl'), random_embeddings(scgpt_ids.tolist(), EMBEDDING_DIMS['scgpt'], rng))
+
+    # idmap 的来源文件: symbol <-> NCBI id (protein_info), symbol -> dbid (dbid2name) -> entity (entity2id)
+    ncbi_ids = np.arange(len(genes), dtype=np.int64) * 7 + 100
+    pd.DataFrame({'Gene names': [f'{gene} {gene}L' for gene in genes], 'NCBI_gene_id': ncbi_ids}).to_csv(path('protein_info.csv'), index=False)
+    dbid_genes = genes[rng.random(len(genes)) < 0.9]
+    dbids = np.arange(len(dbid_genes), dtype=np.int64) + 500000
+    pd.DataFrame({'_id': dbids, 'name': dbid_genes}).to_csv(path('dbid2name.csv'), index=False)
+    pd.DataFrame({'a': dbids, 'b': rng.permutation(len(dbids))}).to_csv(path('entity2id.txt'), sep='\t', header=False, index=False)
+    ppi_edges = write_ppi(path('ppi.csv'), ncbi_ids, config['ppi_edges'], rng)
+
+    return {
+        'sl_rows': len(sl_raw), 'genes': len(sl_genes), 'cell_lines': len(counts),
+        'gct_rows': gct_rows, 'gct_columns': gct_columns, 'ppi_edges': ppi_edges,
+        'ae_samples': config['ae_samples'], 'ae_epochs': config['ae_epochs'], 'feature_dim': pair_feature_dim(),
+    }
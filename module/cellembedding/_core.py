@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+WEIGHTINGS = ('rpkm', 'log1p', 'rank')
+
+def align_gene_embeddings(genes, gene_embeddings:dict):
+    """Stack the embeddings of `genes` into one float32 matrix.
+
+    Returns (matrix, present, missing): `present` is a boolean mask over
+    `genes`, the rows of `matrix` follow the present genes in order, and
+    `missing` lists the genes without an embedding.
+    """
+    present = np.array([gene in gene_embeddings for gene in genes], dtype=bool)
+    missing = [gene for gene, is_present in zip(genes, present) if not is_present]
+    dim = len(next(iter(gene_embeddings.values())))
+    matrix = np.zeros((int(present.sum()), dim), dtype=np.float32)
+    for i, gene in enumerate(gene for gene, is_present in zip(genes, present) if is_present):
+        matrix[i] = gene_embeddings[gene]
+    return matrix, present, missing
+
+def expression_weights(values, weighting='rpkm'):
+    """Turn a (genes, cells) expression block into float32 weights."""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float32), nan=0.0)
+    if weighting == 'rpkm':
+        return values
+    if weighting == 'log1p':
+        return np.log1p(np.clip(values, 0.0, None))
+    if weighting == 'rank':
+        # 每个细胞系内按表达量排名, 缩放到 (0, 1]
+        ranks = pd.DataFrame(values).rank(axis=0, method='average').to_numpy(dtype=np.float32)
+        return ranks / values.shape[0]
+    raise ValueError(f"Unknown weighting: {weighting}, expected one of {WEIGHTINGS}")
+
+def compute_cell_embeddings(gene_expression_df:pd.DataFrame, gene_embeddings:dict, weighting='rpkm', chunk_size=None):
+    """Compute normalized expression-weighted cell line embeddings.
+
+    `gene_expression_df` is indexed by gene symbol with one column per cell
+    line. Genes without an embedding are left out of the sum and reported
+    in the returned `missing` list. Cell embeddings are computed with one
+    matrix multiply per chunk of `chunk_size` cell lines (all at once if None).
+
+    Returns (cell_embeddings, missing) where cell_embeddings is
+    {cell_line: np.ndarray}.
+    """
+    genes = list(gene_expression_df.index)
+    matrix, present, missing = align_gene_embeddings(genes, gene_embeddings)
+
+    columns = list(gene_expression_df.columns)
+    chunk_size = chunk_size or len(columns)
+    cell_embeddings = {}
+    for start in range(0, len(columns), chunk_size):
+        block = gene_expression_df.iloc[:, start:start + chunk_size].to_numpy()
+        # rank 权重在全部基因上计算, 再去掉没有 embedding 的基因
+        weights = expression_weights(block, weighting)[present]
+        embeddings = weights.T @ matrix
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+        for column, embedding in zip(columns[start:start + chunk_size], embeddings):
+            cell_embeddings[column] = embedding
+    return cell_embeddings, missing
@@ -0,0 +1,44 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+def default_threads_per_worker(workers):
+    """Split the CPU cores evenly between `workers` processes."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+def _init_worker(threads):
+    import torch
+    # 每个进程固定线程数, 避免多进程 x 多线程超额占用 CPU
+    torch.set_num_threads(threads)
+
+def _run_job(fn, job):
+    start = time.perf_counter()
+    metrics, payload = fn(**job)
+    return metrics, payload, time.perf_counter() - start
+
+def run_jobs(fn, jobs, workers=0, threads_per_worker=None, mp_context='fork'):
+    """Run `fn(**job)` for every job dict and collect the results.
+
+    `fn` returns (metrics dict, payload). Returns a DataFrame with one row
+    per job (the job's keys, its metrics and `seconds`), in job order, and
+    the list of payloads. `workers=0` runs in this process; otherwise jobs
+    go to a process pool whose workers each use `threads_per_worker` torch
+    threads. The default 'fork' context lets `fn` be defined in a notebook
+    and lets workers reuse the parent's already loaded (or memory-mapped)
+    data instead of receiving pickled copies; it is CPU only, CUDA cannot
+    be used in forked workers.
+    """
+    if workers > 0:
+        threads = threads_per_worker or default_threads_per_worker(workers)
+        context = multiprocessing.get_context(mp_context)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = [pool.submit(_run_job, fn, job) for job in jobs]
+            results = [future.result() for future in futures]
+    else:
+        results = [_run_job(fn, job) for job in jobs]
+
+    rows = [{**job, **metrics, 'seconds': seconds} for job, (metrics, _, seconds) in zip(jobs, results)]
+    return pd.DataFrame(rows), [payload for _, payload, _ in results]
@@ -0,0 +1,210 @@
+import io
+import os
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+
+MATRIX_FILENAME = 'embeddings.npy'
+KEYS_FILENAME = 'keys.txt'
+META_FILENAME = 'meta.json'
+
+class EmbeddingStore:
+    """Embeddings kept as one contiguous float32 `.npy` matrix plus a key -> row index.
+
+    A store is a directory holding `embeddings.npy` (opened with mmap),
+    `keys.txt` (one key per line, row order) and `meta.json`. Keys are
+    strings, or ints when created with key_type='int' (e.g. scGPT ids).
+    Open with mode='r' to read or mode='a' to also append rows in place.
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'a'):
+            raise ValueError(f"Unknown mode: {mode}, expected 'r' or 'a'")
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, META_FILENAME)) as file:
+            meta = json.load(file)
+        self.dim = meta['dim']
+        self.key_type = meta['key_type']
+
+        with open(os.path.join(path, KEYS_FILENAME), 'rb') as file:
+            lines = file.read().split(b'\n')[:-1]
+        n_rows = self._read_header()[0][0]
+        # 追加时先写矩阵再写 key, 中断后以两者中较短的为准
+        lines = lines[:min(len(lines), n_rows)]
+        self._keys = [self._to_key(line.decode('utf-8')) for line in lines]
+        self._keys_bytes = sum(len(line) + 1 for line in lines)
+        self._index = {key: i for i, key in enumerate(self._keys)}
+        self._pd_index = None
+        self._matrix = None
+
+    @classmethod
+    def create(cls, path, dim, key_type='str'):
+        """Create an empty store at `path` and open it for appending."""
+        if key_type not in ('str', 'int'):
+            raise ValueError(f"Unknown key_type: {key_type}, expected 'str' or 'int'")
+        os.makedirs(path, exist_ok=True)
+        np.lib.format.open_memmap(os.path.join(path, MATRIX_FILENAME), mode='w+', dtype=np.float32, shape=(0, dim))
+        open(os.path.join(path, KEYS_FILENAME), 'w', encoding='utf-8').close()
+        with open(os.path.join(path, META_FILENAME), 'w') as file:
+            json.dump({'dim': int(dim), 'key_type': key_type}, file)
+        return cls(path, mode='a')
+
+    @classmethod
+    def open_or_create(cls, path, dim, key_type='str'):
+        """Open an existing store for appending, or create it."""
+        if os.path.exists(os.path.join(path, META_FILENAME)):
+            return cls(path, mode='a')
+        return cls.create(path, dim, key_type)
+
+    def _to_key(self, key):
+        return int(key) if self.key_type == 'int' else str(key)
+
+    def _read_header(self):
+        with open(os.path.join(self.path, MATRIX_FILENAME), 'rb') as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            return shape, file.tell()
+
+    @property
+    def matrix(self):
+        """The (rows, dim) float32 matrix, memory-mapped."""
+        if self._matrix is None:
+            matrix = np.load(os.path.join(self.path, MATRIX_FILENAME), mmap_mode='r' if self.mode == 'r' else 'r+')
+            self._matrix = matrix[:len(self._keys)]
+        return self._matrix
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return self._to_key(key) in self._index
+
+    def __getitem__(self, key):
+        return self.matrix[self._index[self._to_key(key)]]
+
+    def get(self, key, default=None):
+        i = self._index.get(self._to_key(key))
+        return default if i is None else self.matrix[i]
+
+    def indexer(self, keys):
+        """Row of each key in `keys`, -1 for missing keys."""
+        if self._pd_index is None:
+            self._pd_index = pd.Index(self._keys)
+        if self.key_type == 'int':
+            # NaN (如映射失败的 scGPT id) 视为缺失
+            keys = pd.to_numeric(pd.Series(keys, dtype=object), errors='coerce').fillna(-1).astype(np.int64)
+        else:
+            keys = pd.Index(keys, dtype=object).astype(str)
+        return self._pd_index.get_indexer(keys)
+
+    def gather(self, keys, fill=0.0, return_mask=False):
+        """Stack the rows of `keys` into a new (len(keys), dim) array, `fill` for missing keys."""
+        rows = self.indexer(keys)
+        found = rows >= 0
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        out[found] = self.matrix[rows[found]]
+        out[~found] = fill
+        return (out, found) if return_mask else out
+
+    def missing(self, keys):
+        """Keys of `keys` not yet in the store, in order."""
+        return [key for key in keys if self._to_key(key) not in self._index]
+
+    def append(self, keys, vectors):
+        """Append rows in place; keys must be new."""
+        if self.mode != 'a':
+            raise ValueError("Store is opened read-only, use mode='a' to append")
+        keys = [self._to_key(key) for key in keys]
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        if len(set(keys)) != len(keys) or any(key in self._index for key in keys):
+            raise ValueError("Duplicate keys in append")
+        if len(keys) == 0:
+            return
+
+        n_rows = len(self._keys) + len(keys)
+        header_length = self._read_header()[1]
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                                                      'fortran_order': False, 'shape': (n_rows, self.dim)})
+        if len(header.getvalue()) != header_length:
+            raise ValueError("Can not grow the .npy header in place")
+
+        self._matrix = None
+        with open(os.path.join(self.path, MATRIX_FILENAME), 'r+b') as file:
+            file.seek(header_length + len(self._keys) * self.dim * 4)
+            file.write(vectors.tobytes())
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+            file.seek(0)
+            file.write(header.getvalue())
+            file.flush()
+            os.fsync(file.fileno())
+        keys_bytes = ''.join(f'{key}\n' for key in keys).encode('utf-8')
+        with open(os.path.join(self.path, KEYS_FILENAME), 'r+b') as file:
+            # 覆盖上次中断时多写的 key
+            file.seek(self._keys_bytes)
+            file.write(keys_bytes)
+            file.truncate()
+        self._keys_bytes += len(keys_bytes)
+
+        self._keys.extend(keys)
+        for i, key in enumerate(keys, start=n_rows - len(keys)):
+            self._index[key] = i
+        self._pd_index = None
+
+    def to_dict(self):
+        """Load everything as the old {key: np.ndarray} dict."""
+        matrix = np.array(self.matrix)
+        return {key: matrix[i] for i, key in enumerate(self._keys)}
+
+def from_dict(embeddings:dict, path, key_type=None):
+    """Write a {key: vector} dict as a new store at `path`."""
+    keys = list(embeddings.keys())
+    if key_type is None:
+        key_type = 'int' if all(isinstance(key, (int, np.integer)) for key in keys) else 'str'
+    dim = len(next(iter(embeddings.values())))
+    EmbeddingStore.create(path, dim, key_type)
+    matrix = np.lib.format.open_memmap(os.path.join(path, MATRIX_FILENAME), mode='w+', dtype=np.float32, shape=(len(keys), dim))
+    for i, key in enumerate(keys):
+        matrix[i] = embeddings[key]
+    matrix.flush()
+    del matrix
+    with open(os.path.join(path, KEYS_FILENAME), 'w', encoding='utf-8') as file:
+        file.write(''.join(f'{key}\n' for key in keys))
+    return EmbeddingStore(path)
+
+def from_pickle(pkl_path, path, key_type=None):
+    """Convert a pickled {key: np.ndarray} file into a store."""
+    with open(pkl_path, 'rb') as file:
+        embeddings = pickle.load(file)
+    return from_dict(embeddings, path, key_type)
+
+def from_npz(npz_path, path, key_field='gene_ids', value_field='embeddings', key_type='str'):
+    """Convert an `.npz` with parallel key and embedding arrays (ESM / BlueBERT) into a store."""
+    with np.load(npz_path) as data:
+        keys = [str(key) for key in data[key_field]]
+        embeddings = data[value_field]
+    # 重复的 gene id 只保留第一个
+    first = np.sort(np.unique(keys, return_index=True)[1])
+    store = EmbeddingStore.create(path, embeddings.shape[1], key_type)
+    store.append([keys[i] for i in first], embeddings[first])
+    return EmbeddingStore(path)
+
+def load(path, fallback=None):
+    """Open a store, converting it first from `fallback` (.pkl/.pickle/.npz) if it does not exist."""
+    if not os.path.exists(os.path.join(path, META_FILENAME)) and fallback is not None:
+        if fallback.endswith('.npz'):
+            return from_npz(fallback, path)
+        return from_pickle(fallback, path)
+    return EmbeddingStore(path)
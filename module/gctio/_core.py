@@ -0,0 +1,62 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+def read_gct_columns(path):
+    """Column names of a GCT file (third line)."""
+    with open(path) as file:
+        file.readline()
+        file.readline()
+        return file.readline().rstrip('\n').split('\t')
+
+def cell_line_of(column):
+    """CCLE column `<CELL>_<TISSUE>` -> `<CELL>`."""
+    return column.split('_')[0]
+
+def select_cell_line_columns(columns, cell_lines):
+    """Columns whose cell line name is exactly one of `cell_lines`, in file order."""
+    cell_lines = set(cell_lines)
+    return [column for column in columns if column not in ('Name', 'Description') and cell_line_of(column) in cell_lines]
+
+def read_gct(path, genes=None, cell_lines=None, chunksize=2000, dtype=np.float32):
+    """Read a GCT file keeping only the rows of `genes` and the columns of `cell_lines`.
+
+    Rows are streamed in chunks of `chunksize`, so only the selected block
+    is held in memory. The result is indexed by `Description` (first
+    occurrence kept) and its columns are renamed to the bare cell line.
+    """
+    columns = read_gct_columns(path)
+    if cell_lines is None:
+        value_columns = [column for column in columns if column not in ('Name', 'Description')]
+    else:
+        value_columns = select_cell_line_columns(columns, cell_lines)
+    genes = set(genes) if genes is not None else None
+
+    chunks = []
+    reader = pd.read_csv(path, sep='\t', skiprows=2, usecols=['Description'] + value_columns,
+                         dtype={'Description': str, **{column: dtype for column in value_columns}}, chunksize=chunksize)
+    for chunk in reader:
+        if genes is not None:
+            chunk = chunk[chunk['Description'].isin(genes)]
+        chunks.append(chunk)
+
+    expression = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=['Description'] + value_columns)
+    expression = expression.drop_duplicates(subset='Description', keep='first')
+    expression = expression.set_index('Description')
+    expression.columns = [cell_line_of(column) for column in expression.columns]
+    return expression
+
+def save_expression_npy(expression:pd.DataFrame, path):
+    """Save the values as `.npy` and the gene / cell line labels as a `.json` sidecar."""
+    np.save(path, expression.to_numpy(dtype=np.float32))
+    with open(os.path.splitext(path)[0] + '.json', 'w') as file:
+        json.dump({'index': [str(gene) for gene in expression.index], 'columns': [str(column) for column in expression.columns]}, file)
+
+def load_expression_npy(path, mmap_mode='r'):
+    """Inverse of `save_expression_npy`; values are memory-mapped by default."""
+    values = np.load(path, mmap_mode=mmap_mode)
+    with open(os.path.splitext(path)[0] + '.json') as file:
+        labels = json.load(file)
+    return pd.DataFrame(values, index=pd.Index(labels['index'], name='Description'), columns=labels['columns'], copy=False)
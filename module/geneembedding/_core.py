@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import torch
+
+import instrument
+
+def clean_summary(description):
+    """Drop NA and the trailing "[provided by ...]" part of an NCBI summary."""
+    if pd.isna(description):
+        return ""
+    return description.split('[')[0]
+
+def embed_text(tokenizer, model, text):
+    """Mean of the last hidden state over all tokens of one text."""
+    inputs = tokenizer(text, return_tensors="pt")
+    with torch.no_grad():
+        outputs = model(**inputs)
+    return outputs.last_hidden_state.mean(dim=1).numpy()[0]
+
+def length_buckets(lengths, batch_size):
+    """Split indices into batches of similar token length (longest first)."""
+    order = np.argsort(-np.asarray(lengths), kind='stable')
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+def embed_texts_batched(tokenizer, model, texts, batch_size=32, max_length=None):
+    """Yield (indices, embeddings) for length-bucketed batches of `texts`.
+
+    Batches are right-padded to their own longest text and mean-pooled over
+    the attention mask, which gives the same vectors as `embed_text` for a
+    causal model such as GPT-2: real tokens never attend to the padding.
+    """
+    max_length = max_length or getattr(model.config, 'n_positions', None)
+    encoded = tokenizer(list(texts), truncation=max_length is not None, max_length=max_length)['input_ids']
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    tokens_counter = instrument.counter('tokens', 'tokens')
+
+    for batch in length_buckets([len(ids) for ids in encoded], batch_size):
+        width = max(len(encoded[i]) for i in batch)
+        input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        for row, i in enumerate(batch):
+            input_ids[row, :len(encoded[i])] = torch.tensor(encoded[i], dtype=torch.long)
+            attention_mask[row, :len(encoded[i])] = 1
+
+        with torch.no_grad():
+            hidden = model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1)
+        tokens_counter.add(int(attention_mask.sum()))
+        yield batch, embeddings.numpy()
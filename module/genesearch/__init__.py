@@ -1 +1,4 @@
-from .summary import *
\ No newline at end of file
+from .summary import *
+from .cache import *
+from .client import *
+from .store import *
\ No newline at end of file
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+# 只缓存确定性的结果: 0 成功, 1 没有 gene id, 3 没有 summary
+# 2 / 4 是 HTTP 失败, 下次运行需要重新请求
+CACHEABLE_ERROR_CODES = (0, 1, 3)
+
+class GeneSearchCache:
+    """SQLite cache of NCBI responses, keyed by gene symbol and by gene id."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS symbol_id ('
+            'symbol TEXT PRIMARY KEY, gene_id TEXT, error_code INTEGER NOT NULL)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS id_summary ('
+            'gene_id TEXT PRIMARY KEY, summary TEXT, error_code INTEGER NOT NULL)')
+        self._conn.commit()
+
+    def _select(self, table, key, columns, keys):
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            # sqlite 单条语句的参数个数有上限, 分块查询
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT {key}, {columns} FROM {table} WHERE {key} IN ({marks})', chunk)
+                for row in rows:
+                    found[row[0]] = row[1:]
+        return found
+
+    def _insert(self, table, rows):
+        rows = [row for row in rows if row[2] in CACHEABLE_ERROR_CODES]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)', rows)
+            self._conn.commit()
+
+    def get_ids(self, symbols):
+        """Return {symbol: (gene_id, error_code)} for the cached symbols."""
+        return self._select('symbol_id', 'symbol', 'gene_id, error_code', symbols)
+
+    def put_ids(self, rows):
+        """Store (symbol, gene_id, error_code) rows."""
+        self._insert('symbol_id', rows)
+
+    def get_summaries(self, gene_ids):
+        """Return {gene_id: (summary, error_code)} for the cached gene ids."""
+        return self._select('id_summary', 'gene_id', 'summary, error_code', gene_ids)
+
+    def put_summaries(self, rows):
+        """Store (gene_id, summary, error_code) rows."""
+        self._insert('id_summary', rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
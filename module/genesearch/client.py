@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrument
+
+from .cache import GeneSearchCache
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if self.interval == 0.0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class GeneSearchClient:
+    """Concurrent NCBI E-utilities client with batched esummary and an optional SQLite cache.
+
+    Results use the same error codes as `summary.py`:
+    0 ok, 1 no gene id, 2 esearch failed, 3 no summary, 4 esummary failed.
+    """
+
+    def __init__(self, cache_path=None, base_url=EUTILS_URL, max_workers=3, rate=3.0,
+                 batch_size=200, api_key=None, timeout=30, retries=3, backoff=2.0):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate)
+        self.cache = GeneSearchCache(cache_path) if cache_path is not None else None
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        # 线程池与其线程上的 session 在多次调用间复用, 由 close() 释放
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _session(self):
+        # requests.Session 不保证线程安全, 每个线程持有一个带连接池的 session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _get(self, endpoint, params):
+        """GET an E-utilities endpoint, returning (status_code, json or None)."""
+        params = dict(params, retmode='json')
+        if self.api_key:
+            params['api_key'] = self.api_key
+        url = f"{self.base_url}/{endpoint}"
+        status = -1
+        requests_counter = instrument.counter('ncbi_requests', 'requests')
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(self.backoff * attempt)
+            self.rate_limiter.wait()
+            requests_counter.add()
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+            except requests.RequestException:
+                continue
+            status = response.status_code
+            if status == 429 or status >= 500:
+                continue
+            if status != 200:
+                return status, None
+            try:
+                return status, response.json()
+            except ValueError:
+                continue
+        return status, None
+
+    def search_id(self, gene_symbol):
+        """Return (gene_id, error_code) for one symbol."""
+        status, data = self._get('esearch.fcgi', {
+            'db': 'gene', 'term': f"{gene_symbol}[Gene] AND Homo sapiens[Organism]"})
+        if data is None:
+            return None, 2
+        idlist = data.get('esearchresult', {}).get('idlist', [])
+        if len(idlist) > 0:
+            return idlist[0], 0
+        return None, 1
+
+    def fetch_summaries(self, gene_ids):
+        """Return {gene_id: (summary, error_code)} using one esummary request."""
+        gene_ids = list(gene_ids)
+        status, data = self._get('esummary.fcgi', {'db': 'gene', 'id': ','.join(gene_ids)})
+        if data is None:
+            return {gene_id: (None, 4) for gene_id in gene_ids}
+        result = data.get('result', {})
+        summaries = {}
+        for gene_id in gene_ids:
+            summary = result.get(gene_id, {}).get('summary')
+            summaries[gene_id] = (summary, 0) if summary is not None else (None, 3)
+        return summaries
+
+    def search_ids(self, gene_symbols):
+        """Return {symbol: (gene_id, error_code)}, consulting the cache first."""
+        gene_symbols = list(dict.fromkeys(gene_symbols))
+        found = self.cache.get_ids(gene_symbols) if self.cache is not None else {}
+        todo = [symbol for symbol in gene_symbols if symbol not in found]
+        if todo:
+            fetched = dict(zip(todo, self._pool.map(self.search_id, todo)))
+            if self.cache is not None:
+                self.cache.put_ids([(symbol, gene_id, code) for symbol, (gene_id, code) in fetched.items()])
+            found.update(fetched)
+        return found
+
+    def get_summaries(self, gene_ids):
+        """Return {gene_id: (summary, error_code)}, batching esummary requests."""
+        gene_ids = list(dict.fromkeys(gene_ids))
+        found = self.cache.get_summaries(gene_ids) if self.cache is not None else {}
+        todo = [gene_id for gene_id in gene_ids if gene_id not in found]
+        if todo:
+            batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+            for fetched in self._pool.map(self.fetch_summaries, batches):
+                if self.cache is not None:
+                    self.cache.put_summaries([(gene_id, summary, code) for gene_id, (summary, code) in fetched.items()])
+                found.update(fetched)
+        return found
+
+    def get_gene_id_summary_many(self, gene_symbols):
+        """Return {symbol: (gene_id, summary, error_code)}, like `get_gene_id_summary_from_symbol_sim_except`."""
+        ids = self.search_ids(gene_symbols)
+        summaries = self.get_summaries([gene_id for gene_id, code in ids.values() if code == 0])
+        results = {}
+        for symbol, (gene_id, code) in ids.items():
+            if code != 0:
+                results[symbol] = (None, None, code)
+            else:
+                summary, summary_code = summaries[gene_id]
+                results[symbol] = (gene_id, summary, summary_code)
+        return results
+
+    def close(self):
+        self._pool.shutdown()
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,84 @@
+import sqlite3
+
+import pandas as pd
+
+SUMMARY_COLUMNS = ['gene_symbol', 'gene_search_error_code', 'gene_id', 'gene_summary']
+
+class GeneSummaryStore:
+    """SQLite table of per-symbol search results, committed as they arrive.
+
+    Rows keep the order in which symbols were added (`position`), so
+    `export_csv` reproduces the layout of gene_summary.csv. Symbols still
+    to search (error code != 0) are found through a partial index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS gene_summary ('
+            'gene_symbol TEXT PRIMARY KEY, position INTEGER NOT NULL, '
+            'gene_search_error_code INTEGER NOT NULL DEFAULT -1, gene_id INTEGER NOT NULL DEFAULT -1, '
+            "gene_summary TEXT NOT NULL DEFAULT '')")
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS gene_summary_pending ON gene_summary(position) '
+            'WHERE gene_search_error_code != 0')
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM gene_summary').fetchone()[0]
+
+    def add_symbols(self, symbols):
+        """Append symbols not yet in the store, as not searched (-1)."""
+        start = self._conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM gene_summary').fetchone()[0]
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO gene_summary (gene_symbol, position) VALUES (?, ?)',
+            ((str(symbol), start + i) for i, symbol in enumerate(symbols)))
+        self._conn.commit()
+
+    def import_frame(self, gene_df:pd.DataFrame):
+        """Load the rows of an existing gene_summary.csv, keeping their order."""
+        start = self._conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM gene_summary').fetchone()[0]
+        rows = zip(gene_df['gene_symbol'].astype(str), range(start, start + len(gene_df)),
+                   gene_df['gene_search_error_code'].astype(int).tolist(), gene_df['gene_id'].astype(int).tolist(),
+                   gene_df['gene_summary'].fillna('').astype(str))
+        self._conn.executemany('INSERT OR IGNORE INTO gene_summary VALUES (?, ?, ?, ?, ?)', rows)
+        self._conn.commit()
+
+    def pending(self, limit=None):
+        """Symbols without a successful search, in order."""
+        query = 'SELECT gene_symbol FROM gene_summary WHERE gene_search_error_code != 0 ORDER BY position'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        return [row[0] for row in self._conn.execute(query)]
+
+    def put(self, results):
+        """Store {symbol: (gene_id, summary, error_code)} and commit."""
+        rows = [(int(error_code), int(gene_id) if gene_id is not None else -1, str(summary), symbol)
+                for symbol, (gene_id, summary, error_code) in results.items()]
+        self._conn.executemany(
+            'UPDATE gene_summary SET gene_search_error_code = ?, gene_id = ?, gene_summary = ? WHERE gene_symbol = ?', rows)
+        self._conn.commit()
+
+    def counts(self):
+        """(total, found, not found) symbol counts."""
+        return self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(gene_search_error_code = 0), 0), COALESCE(SUM(gene_search_error_code != 0), 0) '
+            'FROM gene_summary').fetchone()
+
+    def to_frame(self):
+        gene_df = pd.read_sql_query(f'SELECT {", ".join(SUMMARY_COLUMNS)} FROM gene_summary ORDER BY position', self._conn)
+        return gene_df.astype({'gene_symbol': 'string', 'gene_search_error_code': int, 'gene_id': int, 'gene_summary': 'string'})
+
+    def export_csv(self, path):
+        """Write the store as gene_summary.csv."""
+        self.to_frame().to_csv(path, index=False)
+
+    def clear(self):
+        self._conn.execute('DELETE FROM gene_summary')
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
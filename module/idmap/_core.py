@@ -0,0 +1,213 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# 各命名空间的键类型; symbol 是中心, 其余命名空间都经由 symbol 互相转换
+# ncbi 只来自 protein_info (与原 ncbi_to_symbol 一致, PPI 图依赖它), genesearch 的结果单独放在 ncbi_search
+# scgpt_protein 只含 protein_info 中出现的符号 (与原 symbol_to_scgpt 一致, SL 特征依赖它), scgpt 为完整词表
+NAMESPACES = {'symbol': 'str', 'ncbi': 'int', 'ncbi_search': 'int', 'scgpt': 'int', 'scgpt_protein': 'int', 'dbid': 'int', 'entity': 'int'}
+SOURCE_FILES = ['protein_info.csv', 'scgpt_gene2idx.txt', 'dbid2name.csv', 'entity2id.txt', 'gene_summary.csv']
+
+def first_gene_name(gene_names:pd.Series):
+    """First space-separated name of protein_info's `Gene names` (NaN stays NaN)."""
+    return gene_names.str.split(n=1).str[0]
+
+def _keys(values, key_type):
+    """Keys as a Series of the namespace type (nullable Int64 or str); unparsable keys become NA."""
+    values = pd.Series(np.asarray(values, dtype=object), dtype=object)
+    if key_type == 'int':
+        return pd.to_numeric(values, errors='coerce').astype('Int64')
+    return values.where(values.isna(), values.astype(str))
+
+def _vocabulary(keys, key_type):
+    """Index of the unique non-missing keys, in order of first appearance."""
+    unique = pd.unique(keys.dropna())
+    return pd.Index(np.asarray(unique, dtype=np.int64 if key_type == 'int' else object))
+
+def _last_wins(src, dst, n_src):
+    """Code array over the source vocabulary; duplicated sources keep the last value, like dict(zip())."""
+    out = np.full(n_src, -1, dtype=np.int64)
+    keep = (src >= 0) & (dst >= 0)
+    src, dst = src[keep], dst[keep]
+    reverse = len(src) - 1 - np.unique(src[::-1], return_index=True)[1]
+    out[src[reverse]] = dst[reverse]
+    return out
+
+def _gather(values, codes):
+    """values[codes] where codes >= 0, -1 elsewhere (also when `values` is empty)."""
+    out = np.full(len(codes), -1, dtype=np.int64)
+    found = codes >= 0
+    out[found] = values[codes[found]]
+    return out
+
+class IdIndex:
+    """Integer-coded cross reference of gene symbols, NCBI ids, scGPT indices, dbids and KG entity ids.
+
+    `ncbi` holds protein_info's NCBI ids, `ncbi_search` the ids found by
+    genesearch (gene_summary.csv). `scgpt` is the whole scGPT vocabulary,
+    `scgpt_protein` only its protein_info symbols.
+
+    `keys[ns]` is the vocabulary of a namespace. `from_symbol[ns]` gives
+    the code in `ns` of every symbol and `to_symbol[ns]` the symbol code of
+    every key of `ns` (-1 when unmapped). Translation between two
+    namespaces goes through the symbol.
+    """
+
+    def __init__(self, keys, from_symbol, to_symbol, meta=None):
+        self.keys = keys
+        self.from_symbol = from_symbol
+        self.to_symbol = to_symbol
+        self.meta = meta or {}
+        self._indexes = {}
+
+    @classmethod
+    def build(cls, protein_info=None, scgpt_gene2idx=None, dbid2name=None, entity2id=None, gene_summary=None, meta=None):
+        """Build from the raw tables, read as in the notebook / file_generate.py; any may be None."""
+        pairs = {ns: [] for ns in NAMESPACES if ns != 'symbol'}
+        if scgpt_gene2idx is not None:
+            pairs['scgpt'].append((scgpt_gene2idx[0], scgpt_gene2idx[1]))
+            if protein_info is not None:
+                in_protein_info = scgpt_gene2idx[0].isin(first_gene_name(protein_info['Gene names']).dropna())
+                pairs['scgpt_protein'].append((scgpt_gene2idx[0][in_protein_info], scgpt_gene2idx[1][in_protein_info]))
+        if gene_summary is not None:
+            found = gene_summary[gene_summary['gene_search_error_code'] == 0]
+            pairs['ncbi_search'].append((found['gene_symbol'], found['gene_id']))
+        if protein_info is not None:
+            pairs['ncbi'].append((first_gene_name(protein_info['Gene names']), protein_info['NCBI_gene_id']))
+        if dbid2name is not None:
+            pairs['dbid'].append((dbid2name['name'], dbid2name['_id']))
+
+        symbols = [_keys(symbol, 'str') for ns in pairs for symbol, _ in pairs[ns]]
+        symbol_index = _vocabulary(pd.concat(symbols, ignore_index=True) if symbols else pd.Series([], dtype=object), 'str')
+        keys = {'symbol': symbol_index.to_numpy()}
+        from_symbol, to_symbol = {}, {}
+        for ns, ns_pairs in pairs.items():
+            if ns == 'entity':
+                continue
+            ns_symbols = pd.concat([_keys(symbol, 'str') for symbol, _ in ns_pairs] or [_keys([], 'str')], ignore_index=True)
+            ns_keys = pd.concat([_keys(key, NAMESPACES[ns]) for _, key in ns_pairs] or [_keys([], NAMESPACES[ns])], ignore_index=True)
+            ns_index = _vocabulary(ns_keys, NAMESPACES[ns])
+            # 任一侧缺失的行在 _last_wins 中丢弃
+            symbol_codes = symbol_index.get_indexer(ns_symbols)
+            key_codes = ns_index.get_indexer(ns_keys)
+            keys[ns] = ns_index.to_numpy()
+            from_symbol[ns] = _last_wins(symbol_codes, key_codes, len(symbol_index))
+            to_symbol[ns] = _last_wins(key_codes, symbol_codes, len(ns_index))
+
+        # entity 只通过 dbid 连接: symbol -> dbid -> entity
+        dbid_index = pd.Index(keys['dbid'])
+        if entity2id is not None:
+            entity2id = entity2id[(entity2id['a'] != 'a') & (entity2id['b'] != 'b')]
+            a, b = _keys(entity2id['a'], 'int'), _keys(entity2id['b'], 'int')
+            entity_index = _vocabulary(b, 'int')
+            dbid_to_entity = _last_wins(dbid_index.get_indexer(a), entity_index.get_indexer(b), len(dbid_index))
+            entity_to_dbid = _last_wins(entity_index.get_indexer(b), dbid_index.get_indexer(a), len(entity_index))
+        else:
+            entity_index = pd.Index(np.empty(0, dtype=np.int64))
+            dbid_to_entity = np.full(len(dbid_index), -1, dtype=np.int64)
+            entity_to_dbid = np.empty(0, dtype=np.int64)
+        keys['entity'] = entity_index.to_numpy()
+        from_symbol['entity'] = _gather(dbid_to_entity, from_symbol['dbid'])
+        to_symbol['entity'] = _gather(to_symbol['dbid'], entity_to_dbid)
+        return cls(keys, from_symbol, to_symbol, meta)
+
+    def index(self, namespace):
+        if namespace not in self._indexes:
+            self._indexes[namespace] = pd.Index(self.keys[namespace])
+        return self._indexes[namespace]
+
+    def codes(self, values, namespace):
+        """Code of each value in the vocabulary of `namespace`, -1 if unknown."""
+        return self.index(namespace).get_indexer(_keys(values, NAMESPACES[namespace]))
+
+    def translate(self, values, src, dst, fill=None, return_mask=False):
+        """Map an array of `src` keys to `dst` keys; unmapped values get `fill`.
+
+        `fill=None` gives -1 for int namespaces and None for str ones.
+        """
+        codes = self.codes(values, src)
+        if src != 'symbol':
+            codes = _gather(self.to_symbol[src], codes)
+        if dst != 'symbol':
+            codes = _gather(self.from_symbol[dst], codes)
+        found = codes >= 0
+        if NAMESPACES[dst] == 'int':
+            out = np.full(len(codes), -1 if fill is None else fill, dtype=np.int64)
+            out[found] = self.keys[dst][codes[found]]
+        else:
+            out = np.full(len(codes), fill, dtype=object)
+            out[found] = self.keys[dst][codes[found]]
+        return (out, found) if return_mask else out
+
+    def series(self, values, src, dst):
+        """`translate` as a pandas Series with missing values as NA (nullable Int64 for int namespaces)."""
+        out, found = self.translate(values, src, dst, return_mask=True)
+        if NAMESPACES[dst] == 'int':
+            return pd.Series(pd.array(np.where(found, out, 0), dtype='Int64')).where(found, pd.NA)
+        return pd.Series(out, dtype=object).where(found, np.nan)
+
+    def mapping(self, src, dst):
+        """{src key: dst key} of all mapped `src` keys."""
+        out, found = self.translate(self.keys[src], src, dst, return_mask=True)
+        return dict(zip(self.keys[src][found].tolist(), out[found].tolist()))
+
+    def save(self, path):
+        arrays = {'meta': np.array(json.dumps(self.meta)), 'namespaces': np.array(list(NAMESPACES))}
+        for ns, key_type in NAMESPACES.items():
+            arrays[f'keys_{ns}'] = np.asarray(self.keys[ns], dtype=str if key_type == 'str' else np.int64)
+            if ns != 'symbol':
+                arrays[f'from_symbol_{ns}'] = self.from_symbol[ns]
+                arrays[f'to_symbol_{ns}'] = self.to_symbol[ns]
+        np.savez(path + '.tmp.npz', **arrays)
+        os.replace(path + '.tmp.npz', path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if 'namespaces' not in data.files or data['namespaces'].tolist() != list(NAMESPACES):
+                raise ValueError(f'{path} was saved with other namespaces than {list(NAMESPACES)}')
+            keys = {ns: data[f'keys_{ns}'].astype(object if key_type == 'str' else np.int64) for ns, key_type in NAMESPACES.items()}
+            from_symbol = {ns: data[f'from_symbol_{ns}'] for ns in NAMESPACES if ns != 'symbol'}
+            to_symbol = {ns: data[f'to_symbol_{ns}'] for ns in NAMESPACES if ns != 'symbol'}
+            return cls(keys, from_symbol, to_symbol, json.loads(str(data['meta'])))
+
+def source_fingerprint(data_dir):
+    """(size, mtime) of each source file present in `data_dir`."""
+    fingerprint = {}
+    for filename in SOURCE_FILES:
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint[filename] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+def build_from_dir(data_dir):
+    """Read whichever source files exist in `data_dir` and build the index."""
+    def read(filename, **kwargs):
+        path = os.path.join(data_dir, filename)
+        return pd.read_csv(path, **kwargs) if os.path.exists(path) else None
+    return IdIndex.build(
+        protein_info=read('protein_info.csv', usecols=['Gene names', 'NCBI_gene_id']),
+        scgpt_gene2idx=read('scgpt_gene2idx.txt', sep='\t', header=None),
+        dbid2name=read('dbid2name.csv', usecols=['_id', 'name']),
+        entity2id=read('entity2id.txt', sep='\t', header=None, names=['a', 'b'], dtype=str),
+        gene_summary=read('gene_summary.csv', usecols=['gene_symbol', 'gene_id', 'gene_search_error_code']),
+        meta={'sources': source_fingerprint(data_dir)},
+    )
+
+def load_or_build(data_dir, path=None):
+    """Load `<data_dir>/id_index.npz`, rebuilding it when a source file changed."""
+    path = os.path.join(data_dir, 'id_index.npz') if path is None else path
+    if os.path.exists(path):
+        try:
+            index = IdIndex.load(path)
+        except ValueError:
+            # 旧版本保存的命名空间不同, 重新构建
+            index = None
+        if index is not None and index.meta.get('sources') == source_fingerprint(data_dir):
+            return index
+    index = build_from_dir(data_dir)
+    index.save(path)
+    return index
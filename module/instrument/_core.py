@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from .profiler import SamplingProfiler
+
+def rss_mb():
+    """Current resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1 << 20) if sys.platform == 'darwin' else maxrss / 1024
+
+class Counter:
+    """Running total of `unit` with a throughput summary at most every `console_interval` seconds.
+
+    `add` only updates the total and checks the clock, so it can be called
+    per item in a hot loop.
+    """
+
+    def __init__(self, recorder, name, unit):
+        self.recorder = recorder
+        self.name = name
+        self.unit = unit
+        self.total = 0
+        self.start = time.perf_counter()
+        self._last_time = self.start
+        self._last_total = 0
+        self._lock = threading.Lock()
+
+    def add(self, n=1):
+        with self._lock:
+            self.total += n
+            now = time.perf_counter()
+            if now - self._last_time < self.recorder.console_interval:
+                return
+            recent = (self.total - self._last_total) / (now - self._last_time)
+            self._last_time, self._last_total = now, self.total
+        self._report(now, recent)
+
+    def _report(self, now, recent=None):
+        rate = self.total / max(now - self.start, 1e-9)
+        self.recorder.emit('counter', name=self.name, unit=self.unit, total=self.total, rate=rate, recent_rate=recent)
+        summary = f'[{self.name}] {self.total} {self.unit}, {rate:.1f} {self.unit}/s'
+        if recent is not None:
+            summary += f' (recent {recent:.1f}/s)'
+        self.recorder.console(summary)
+
+    def close(self):
+        """Emit the final total and rate."""
+        self._report(time.perf_counter())
+
+class Recorder:
+    """Structured progress events as JSONL plus a rate-limited console summary.
+
+    Every event is one JSON object with `event`, `t` (seconds since the
+    recorder started) and its own fields; `path=None` keeps only the
+    console output. `sample_interval` starts a thread recording RSS and
+    CPU use every that many seconds. Stages run with `profile` (or with
+    the INSTRUMENT_PROFILE environment variable set to a directory) write
+    folded stacks to `<profile dir>/<stage>.folded`.
+    """
+
+    def __init__(self, path=None, console_interval=10.0, sample_interval=None, profile_dir=None, console=print):
+        self.path = path
+        self.console_interval = console_interval
+        self.profile_dir = profile_dir or os.environ.get('INSTRUMENT_PROFILE')
+        self.console = console
+        self.start = time.perf_counter()
+        self.counters = {}
+        self._file = None
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'a', buffering=1)
+        self._sampler = None
+        self._stop = threading.Event()
+        if sample_interval:
+            self._sampler = threading.Thread(target=self._sample, args=(sample_interval,), daemon=True)
+            self._sampler.start()
+
+    def emit(self, event, **fields):
+        if self._file is None:
+            return
+        line = json.dumps({'event': event, 't': round(time.perf_counter() - self.start, 6), **fields}, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def counter(self, name, unit='items'):
+        """The counter called `name`, created on first use."""
+        with self._lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(self, name, unit)
+            return self.counters[name]
+
+    @contextmanager
+    def stage(self, name, profile=None, **fields):
+        """Time a block: emits stage_start / stage_end with wall and CPU seconds and RSS."""
+        # profile: None 跟随 profile_dir / INSTRUMENT_PROFILE, True 默认写到 ./profiles, False 关闭, 字符串为目录
+        if profile is None or profile is False:
+            profile_dir = self.profile_dir if profile is None else None
+        else:
+            profile_dir = (self.profile_dir or 'profiles') if profile is True else profile
+        profiler = SamplingProfiler(threading.get_ident()) if profile_dir else None
+        self.emit('stage_start', name=name, rss_mb=rss_mb(), **fields)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.start()
+        status = 'error'
+        try:
+            yield
+            status = 'ok'
+        finally:
+            seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+            end = dict(name=name, status=status, seconds=seconds, cpu_seconds=cpu_seconds, rss_mb=rss_mb(), **fields)
+            if profiler is not None:
+                profiler.stop()
+                os.makedirs(profile_dir, exist_ok=True)
+                end['profile'] = profiler.write(os.path.join(profile_dir, f'{name}.folded'))
+            self.emit('stage_end', **end)
+            self.console(f'[{name}] {status} in {seconds:.2f}s (cpu {cpu_seconds:.2f}s)')
+
+    def _sample(self, interval):
+        last_wall, last_cpu = time.perf_counter(), time.process_time()
+        while not self._stop.wait(interval):
+            wall, cpu = time.perf_counter(), time.process_time()
+            # cpu_percent 为所有线程合计, 多线程时可超过 100
+            self.emit('resources', rss_mb=rss_mb(), cpu_percent=100.0 * (cpu - last_cpu) / max(wall - last_wall, 1e-9),
+                      threads=threading.active_count())
+            last_wall, last_cpu = wall, cpu
+
+    def close(self):
+        """Stop sampling, emit the final counter totals and close the file."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        for counter in list(self.counters.values()):
+            if counter.total:
+                counter.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# 与 logging 类似, 模块级的默认 recorder 只输出到控制台, 由脚本入口调用 configure 启用 JSONL
+_recorder = Recorder()
+
+def configure(path=None, console_interval=10.0, sample_interval=None, profile_dir=None, console=print):
+    """Replace the default recorder (closing the previous one) and return it."""
+    global _recorder
+    _recorder.close()
+    _recorder = Recorder(path, console_interval, sample_interval, profile_dir, console)
+    return _recorder
+
+def get_recorder():
+    return _recorder
+
+def emit(event, **fields):
+    _recorder.emit(event, **fields)
+
+def counter(name, unit='items'):
+    return _recorder.counter(name, unit)
+
+def stage(name, profile=None, **fields):
+    return _recorder.stage(name, profile, **fields)
+
+def close():
+    _recorder.close()
@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+
+class SamplingProfiler:
+    """Sample the Python stack of one thread and count folded stacks.
+
+    A background thread reads the target thread's current frame every
+    `interval` seconds; `write` produces the `frame;frame;frame count`
+    format read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def write(self, path):
+        """Write the folded stacks, heaviest first; returns `path`."""
+        with open(path, 'w') as file:
+            for stack, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+                file.write(f'{stack} {count}\n')
+        return path
@@ -0,0 +1,3 @@
+from ._core import *
+from .cache import *
+from .reduction import *
\ No newline at end of file
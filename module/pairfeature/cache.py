@@ -0,0 +1,132 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from ._core import FEATURE_BLOCKS
+
+KEY_COLUMNS = ['geneA_ID', 'geneB_ID']
+# scGPT id 由基因符号映射得到, 映射变化时整个细胞系重新计算
+KEY_HASH_COLUMNS = ['geneA_ID', 'geneB_ID', 'geneA_scGPT_id', 'geneB_scGPT_id']
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """sha1 of a file's content."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def table_fingerprint(table):
+    """sha1 of an EmbeddingTable's keys and matrix."""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(pd.Series(table.index), index=False).to_numpy().tobytes())
+    digest.update(np.ascontiguousarray(table.matrix).tobytes())
+    return digest.hexdigest()
+
+class PairFeatureCache:
+    """On-disk per-cell-line feature matrices shared by all CV folds and reruns.
+
+    Each cell line gets `<cache_dir>/<cell_line>/features.npy` holding the
+    features of its unique (geneA, geneB) pairs, opened with mmap, plus
+    `pairs.csv` and `meta.json`. Every feature block carries its own
+    fingerprint, so a changed input only recomputes that block's columns.
+    `fingerprints` may map blocks to file fingerprints (see
+    `file_fingerprint`); blocks left out are fingerprinted from the
+    builder's loaded tables.
+    """
+
+    def __init__(self, builder, cache_dir, fingerprints=None, block_size=4096):
+        self.builder = builder
+        self.cache_dir = cache_dir
+        self.block_size = block_size
+        self.fingerprints = dict(fingerprints or {})
+        for block in FEATURE_BLOCKS:
+            if block in self.fingerprints:
+                continue
+            if block == 'expr':
+                digest = hashlib.sha1(np.ascontiguousarray(builder.expr_values).tobytes())
+                digest.update('\t'.join(map(str, builder.expr_index)).encode('utf-8'))
+                digest.update('\t'.join(map(str, builder.expr_columns)).encode('utf-8'))
+                self.fingerprints[block] = digest.hexdigest()
+            else:
+                self.fingerprints[block] = table_fingerprint(builder.tables[block])
+        self._features = {}
+        self._pairs = {}
+
+    def _dir(self, cell_line):
+        return os.path.join(self.cache_dir, str(cell_line).replace(os.sep, '_'))
+
+    def materialize(self, cell_line, cell_df:pd.DataFrame):
+        """Build (or refresh the stale blocks of) the cache for one cell line."""
+        cell_dir = self._dir(cell_line)
+        features_path = os.path.join(cell_dir, 'features.npy')
+        meta_path = os.path.join(cell_dir, 'meta.json')
+
+        pairs = cell_df.drop_duplicates(subset=KEY_COLUMNS).reset_index(drop=True)
+        keys_hash = hashlib.sha1(pd.util.hash_pandas_object(pairs[KEY_HASH_COLUMNS], index=False).to_numpy().tobytes()).hexdigest()
+        widths = self.builder.widths()
+        n_features = sum(width for _, width in widths)
+
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+        if meta is not None and meta['keys'] == keys_hash and meta['n_features'] == n_features:
+            stale = [block for block, _ in widths if meta['blocks'].get(block) != self.fingerprints[block]]
+            features = np.load(features_path, mmap_mode='r+') if stale else None
+        else:
+            os.makedirs(cell_dir, exist_ok=True)
+            meta = {'keys': keys_hash, 'n_features': n_features, 'blocks': {}}
+            stale = [block for block, _ in widths]
+            pairs[KEY_COLUMNS].to_csv(os.path.join(cell_dir, 'pairs.csv'), index=False)
+            features = np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float32, shape=(len(pairs), n_features))
+
+        if stale:
+            print(f'Pair feature cache({cell_line}): computing {stale} for {len(pairs)} pairs')
+            codes = self.builder.encode(pairs)
+            col = 0
+            for block, width in widths:
+                if block in stale:
+                    for start in range(0, len(pairs), self.block_size):
+                        stop = min(start + self.block_size, len(pairs))
+                        buffer = np.empty((stop - start, width), dtype=np.float32)
+                        features[start:stop, col:col + width] = self.builder.fill(buffer, codes, start, stop, [block])
+                    meta['blocks'][block] = self.fingerprints[block]
+                col += width
+            features.flush()
+            del features
+            with open(meta_path + '.tmp', 'w') as file:
+                json.dump(meta, file)
+            os.replace(meta_path + '.tmp', meta_path)
+
+        self._features[cell_line] = np.load(features_path, mmap_mode='r')
+        self._pairs[cell_line] = pd.MultiIndex.from_frame(pairs[KEY_COLUMNS])
+        return self._features[cell_line]
+
+    def rows(self, cell_line, df:pd.DataFrame):
+        """Cached row of each pair in `df`."""
+        if cell_line not in self._pairs:
+            raise KeyError(f"Cell line {cell_line} is not materialized")
+        rows = self._pairs[cell_line].get_indexer(pd.MultiIndex.from_frame(df[KEY_COLUMNS]))
+        if (rows < 0).any():
+            raise KeyError(f"{(rows < 0).sum()} pairs are not in the cache of {cell_line}")
+        return rows
+
+    def get(self, cell_line, df:pd.DataFrame, is_train=True, blocks=None):
+        """Same output as `PairFeatureBuilder.build`, sliced from the cached matrix."""
+        rows = self.rows(cell_line, df)
+        features = self._features[cell_line]
+        if blocks is None:
+            out = np.asarray(features[rows])
+        else:
+            columns = []
+            col = 0
+            for block, width in self.builder.widths():
+                if block in blocks:
+                    columns.append(np.arange(col, col + width))
+                col += width
+            out = np.asarray(features[np.ix_(rows, np.concatenate(columns))])
+        return (out, df['label'].to_numpy()) if is_train else out
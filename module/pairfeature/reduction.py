@@ -0,0 +1,95 @@
+import os
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .cache import table_fingerprint
+
+# 各嵌入表默认降到的维度; PPI 本身只有 64 维, 表达量为标量, 不降维
+DEFAULT_DIMS = {'scgpt': 64, 'geneformer': 64, 'gene_emb': 64, 'genePT': 64, 'cell_emb': 64}
+
+def fit_pca(matrix, n_components, method='incremental', chunk_size=4096, seed=0):
+    """PCA of the rows of `matrix` -> (mean, components, explained_variance_ratio).
+
+    'incremental' streams `chunk_size` rows at a time through
+    IncrementalPCA, so `matrix` may be a memmap larger than memory;
+    'randomized' runs one randomized SVD over the whole matrix.
+    """
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    n_components = min(n_components, *matrix.shape)
+    if method == 'incremental':
+        pca = IncrementalPCA(n_components=n_components)
+        # 每块至少 n_components 行, IncrementalPCA 才能 partial_fit
+        n_chunks = max(1, len(matrix) // max(chunk_size, n_components))
+        for bounds in np.array_split(np.arange(len(matrix)), n_chunks):
+            pca.partial_fit(np.asarray(matrix[bounds[0]:bounds[-1] + 1], dtype=np.float32))
+    elif method == 'randomized':
+        pca = PCA(n_components=n_components, svd_solver='randomized', random_state=seed)
+        pca.fit(np.asarray(matrix, dtype=np.float32))
+    else:
+        raise ValueError(f"Unknown PCA method {method!r}, expected 'incremental' or 'randomized'")
+    return pca.mean_.astype(np.float32), pca.components_.astype(np.float32), pca.explained_variance_ratio_
+
+class TableReduction:
+    """Per-source PCA of the embedding tables, fitted once per table content.
+
+    Each table in `dims` is projected to `dims[block]` components; the
+    fit is saved as `<cache_dir>/<table fingerprint>-<method>-<n>.npz`
+    and reused by every later run with the same table, whichever block
+    it belongs to (cell_emb defaults to the genePT table, so they share
+    one fit). `apply` returns a builder whose tables hold the projected
+    rows, so pair features, the pair feature cache and pair scoring
+    work in the reduced space unchanged. Missing keys gather the origin
+    of the reduced space, i.e. the table mean.
+    """
+
+    def __init__(self, cache_dir, dims=None, method='incremental', chunk_size=4096, seed=0):
+        self.cache_dir = cache_dir
+        self.dims = dict(DEFAULT_DIMS if dims is None else dims)
+        self.method = method
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.projections = {}
+
+    def projection(self, table, n_components):
+        """(mean, components, explained_variance_ratio) of `table`, loaded from the cache or fitted and saved."""
+        n_rows = len(table.matrix) - 1
+        n_components = min(n_components, n_rows, table.dim)
+        path = os.path.join(self.cache_dir, f'{table_fingerprint(table)}-{self.method}-{n_components}.npz')
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return data['mean'], data['components'], data['explained_variance_ratio']
+        print(f'Table reduction: fitting {self.method} PCA {table.dim} -> {n_components} on {n_rows} rows')
+        # 最后一行是缺失键对应的零向量, 不参与拟合
+        mean, components, ratio = fit_pca(table.matrix[:n_rows], n_components, self.method, self.chunk_size, self.seed)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.savez(path + '.tmp.npz', mean=mean, components=components, explained_variance_ratio=ratio)
+        os.replace(path + '.tmp.npz', path)
+        return mean, components, ratio
+
+    def apply(self, builder):
+        """A copy of `builder` with every table in `dims` replaced by its projection."""
+        reduced = copy.copy(builder)
+        reduced.tables = dict(builder.tables)
+        for block, n_components in self.dims.items():
+            table = builder.tables[block]
+            if table.dim == 0 or len(table.matrix) <= 1:
+                continue
+            mean, components, ratio = self.projection(table, n_components)
+            self.projections[block] = (mean, components, ratio)
+            projected = copy.copy(table)
+            projected.matrix = np.zeros((len(table.matrix), len(components)), dtype=np.float32)
+            for start in range(0, len(table.matrix) - 1, self.chunk_size):
+                stop = min(start + self.chunk_size, len(table.matrix) - 1)
+                projected.matrix[start:stop] = (table.matrix[start:stop] - mean) @ components.T
+            projected.dim = len(components)
+            reduced.tables[block] = projected
+        return reduced
+
+    def summary(self):
+        """One row per reduced block: components and the fraction of variance they keep."""
+        return pd.DataFrame([{'block': block, 'input_dim': components.shape[1], 'n_components': len(components),
+                              'explained_variance': float(np.sum(ratio))}
+                             for block, (_, components, ratio) in self.projections.items()])
@@ -0,0 +1 @@
+from ._core import *
\ No newline at end of file
@@ -0,0 +1,134 @@
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import torch
+
+def n_pairs(n_genes):
+    """Number of unordered pairs (i < j) of `n_genes` genes."""
+    return n_genes * (n_genes - 1) // 2
+
+def _row_start(row, n_genes):
+    return row * (2 * n_genes - row - 1) // 2
+
+def pair_index(k, n_genes):
+    """Linear indices of the pairs (i < j), in row-major order, -> (i, j) arrays."""
+    k = np.asarray(k, dtype=np.int64)
+    n = n_genes
+    i = np.floor(n - 0.5 - np.sqrt((n - 0.5) ** 2 - 2.0 * k)).astype(np.int64)
+    # 浮点误差修正: 保证 row_start(i) <= k < row_start(i + 1)
+    i = np.where(_row_start(i, n) > k, i - 1, i)
+    i = np.where(_row_start(i + 1, n) <= k, i + 1, i)
+    j = k - _row_start(i, n) + i + 1
+    return i, j
+
+def _top_scores(builder, encoder, classifier, gene_codes, cell_line, pairs, start, stop, top_k, block_size, device):
+    """Top `top_k` of the pairs at positions [start, stop) as a heap of (score, position).
+
+    `pairs(block_start, block_stop)` gives the (a, b) gene rows of a block
+    of positions. Pairs are built `block_size` at a time into one reused
+    buffer, so memory does not grow with the size of the range.
+    """
+    heap = []
+    buffer = np.empty((min(block_size, max(stop - start, 0)), builder.n_features()), dtype=np.float32)
+    with torch.inference_mode():
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            a, b = pairs(block_start, block_stop)
+            codes = builder.pair_codes(gene_codes, cell_line, a, b)
+            features = builder.fill(buffer[:block_stop - block_start], codes, 0, block_stop - block_start)
+            scores = classifier(encoder(torch.from_numpy(features).to(device))).float().cpu().numpy().reshape(-1)
+            # 先取本块的 top_k, 再与堆合并
+            candidates = np.argpartition(-scores, top_k)[:top_k] if len(scores) > top_k else np.arange(len(scores))
+            for idx in candidates:
+                item = (float(scores[idx]), block_start + int(idx))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+    return heap
+
+def score_pair_range(builder, encoder, classifier, gene_codes, cell_line, start, stop, top_k=1000, block_size=65536, device='cpu'):
+    """Scores of the top `top_k` pairs with linear index in [start, stop), as [(score, index)]."""
+    n_genes = len(gene_codes['expr'])
+    return _top_scores(builder, encoder, classifier, gene_codes, cell_line,
+                       lambda block_start, block_stop: pair_index(np.arange(block_start, block_stop), n_genes),
+                       start, stop, top_k, block_size, device)
+
+def _top_frame(genes, a, b, top, output_path):
+    """DataFrame of geneA_ID, geneB_ID, score for the pairs (genes[a[i]], genes[b[i]]) scored top[i]."""
+    scores = np.array([score for score, _ in top], dtype=np.float32)
+    result = pd.DataFrame({'geneA_ID': genes[a], 'geneB_ID': genes[b], 'score': scores})
+    if output_path is not None:
+        result.to_csv(output_path, index=False)
+    return result
+
+# fork 出的子进程直接继承这些对象, 不需要序列化特征表和模型
+_worker_state = {}
+
+def _init_worker(threads):
+    torch.set_num_threads(threads)
+
+def _score_worker(task):
+    start, stop = task
+    return score_pair_range(start=start, stop=stop, **_worker_state)
+
+def score_cell_line(builder, encoder, classifier, genes, scgpt_ids, cell_line, top_k=1000, block_size=65536,
+                    workers=0, threads_per_worker=1, device='cpu', output_path=None):
+    """Score every unordered pair of `genes` in `cell_line` and keep the top `top_k`.
+
+    `encoder` and `classifier` are the trained autoencoder encoder and
+    SLClassifier (put in eval mode here). With `workers > 0` the pair
+    space is split into contiguous index ranges, one per worker process
+    (fork context, CPU only). Returns a DataFrame of geneA_ID, geneB_ID,
+    score sorted by score, also written to `output_path` if given.
+    """
+    encoder.eval()
+    classifier.eval()
+    genes = np.asarray(genes, dtype=object)
+    gene_codes = builder.encode_genes(genes, scgpt_ids)
+    total = n_pairs(len(genes))
+    print(f"{cell_line}: scoring {total} pairs of {len(genes)} genes")
+
+    state = dict(builder=builder, encoder=encoder, classifier=classifier, gene_codes=gene_codes, cell_line=cell_line,
+                 top_k=top_k, block_size=block_size, device=device)
+    if workers > 0:
+        bounds = np.linspace(0, total, workers + 1).astype(np.int64)
+        _worker_state.update(state)
+        try:
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+                heaps = list(pool.map(_score_worker, zip(bounds[:-1], bounds[1:])))
+        finally:
+            _worker_state.clear()
+        top = heapq.nlargest(top_k, (item for heap in heaps for item in heap))
+    else:
+        top = score_pair_range(start=0, stop=total, **state)
+
+    top = sorted(top, reverse=True)
+    a, b = pair_index(np.array([index for _, index in top], dtype=np.int64), len(genes))
+    return _top_frame(genes, a, b, top, output_path)
+
+def score_pairs(builder, encoder, classifier, genes, scgpt_ids, cell_line, a, b, top_k=1000, block_size=65536,
+                device='cpu', output_path=None):
+    """Score only the pairs (genes[a[i]], genes[b[i]]) in `cell_line` and keep the top `top_k`.
+
+    For a pre-filtered candidate list, e.g. the nearest-neighbour pairs
+    from `simsearch.candidate_pairs`, instead of all pairs of `genes`.
+    Returns the same DataFrame as `score_cell_line`.
+    """
+    encoder.eval()
+    classifier.eval()
+    genes = np.asarray(genes, dtype=object)
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    gene_codes = builder.encode_genes(genes, scgpt_ids)
+    print(f"{cell_line}: scoring {len(a)} candidate pairs of {len(genes)} genes")
+
+    top = _top_scores(builder, encoder, classifier, gene_codes, cell_line,
+                      lambda block_start, block_stop: (a[block_start:block_stop], b[block_start:block_stop]),
+                      0, len(a), top_k, block_size, device)
+    top = sorted(top, reverse=True)
+    positions = np.array([position for _, position in top], dtype=np.int64)
+    return _top_frame(genes, a[positions], b[positions], top, output_path)
\ No newline at end of file
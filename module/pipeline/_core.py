@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class Stage:
+    """One script of the pipeline with the data files it reads and writes.
+
+    `deps` are the modules the script imports, as files or package
+    directories (all their .py files), so that editing them re-runs it.
+    """
+
+    def __init__(self, name, script, inputs, outputs, args=(), deps=()):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.deps = list(deps)
+
+    def command(self):
+        return [sys.executable, self.script] + [str(arg) for arg in self.args]
+
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_files(path):
+    """`path` itself, or the .py files under a package directory in sorted order."""
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.py'))
+    return files
+
+# Linux 在 exec 时把 fork 前父进程的内存峰值计入子进程的 ru_maxrss, 直接 wait4 会得到父进程的大小;
+# 因此由一个只含解释器的启动进程 spawn 命令, 再 wait4 取得其 rusage 写到 argv[1]
+RUSAGE_LAUNCHER = '''
+import os, sys
+pid = os.posix_spawn(sys.argv[2], sys.argv[2:], os.environ)
+_, status, usage = os.wait4(pid, 0)
+with open(sys.argv[1], 'w') as file:
+    file.write(str(usage.ru_maxrss))
+sys.exit(os.waitstatus_to_exitcode(status))
+'''
+
+def run_process(command, log_path, cwd=None):
+    """Run a command, return (return code, peak RSS in MB or None)."""
+    with open(log_path, 'w') as log:
+        if not (hasattr(os, 'wait4') and hasattr(os, 'posix_spawn')):
+            return subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, cwd=cwd).returncode, None
+        rusage_path = log_path + '.maxrss'
+        command = [shutil.which(command[0]) or command[0]] + list(command[1:])
+        returncode = subprocess.run([sys.executable, '-c', RUSAGE_LAUNCHER, rusage_path] + command,
+                                    stdout=log, stderr=subprocess.STDOUT, cwd=cwd).returncode
+    try:
+        with open(rusage_path) as file:
+            maxrss = int(file.read())
+        os.remove(rusage_path)
+    except (OSError, ValueError):
+        return returncode, None
+    # Linux 上 ru_maxrss 的单位是 KB, macOS 上是字节
+    return returncode, maxrss / (1 << 20) if sys.platform == 'darwin' else maxrss / 1024
+
+class Pipeline:
+    """Run stages in dependency order, skipping those whose inputs did not change.
+
+    A stage depends on the stages producing its inputs. It is re-run when
+    one of its outputs is missing or when the sha1 of an input, of its
+    script, of a module it depends on or its arguments differs from the last successful run
+    (recorded in `state_path`). Independent stages run concurrently, up to
+    `workers` at a time, each as its own process with its output in
+    `<log_dir>/<stage>.log`.
+    """
+
+    def __init__(self, stages, state_path, log_dir, cwd=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.log_dir = log_dir
+        self.cwd = cwd
+        producers = {output: stage.name for stage in stages for output in stage.outputs}
+        self.upstream = {stage.name: sorted({producers[path] for path in stage.inputs if path in producers} - {stage.name}) for stage in stages}
+        self.state = {'stages': {}, 'hashes': {}}
+        if os.path.exists(state_path):
+            with open(state_path) as file:
+                self.state = json.load(file)
+        self._lock = threading.Lock()
+
+    def _hash(self, path):
+        """sha1 of a file, reused while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self.state['hashes'].get(path)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        digest = file_sha1(path)
+        with self._lock:
+            self.state['hashes'][path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def _signature(self, stage):
+        return {
+            'script': self._hash(stage.script),
+            'args': [str(arg) for arg in stage.args],
+            'inputs': {path: self._hash(path) if os.path.exists(path) else None for path in stage.inputs},
+            'deps': {path: self._hash(path) if os.path.exists(path) else None for dep in stage.deps for path in source_files(dep)},
+        }
+
+    def is_stale(self, stage):
+        if not all(os.path.exists(path) for path in stage.outputs):
+            return True
+        return self.state['stages'].get(stage.name) != self._signature(stage)
+
+    def _save_state(self):
+        with self._lock:
+            with open(self.state_path + '.tmp', 'w') as file:
+                json.dump(self.state, file, indent=1)
+            os.replace(self.state_path + '.tmp', self.state_path)
+
+    def _run_stage(self, stage, force):
+        start = time.perf_counter()
+        if not force and not self.is_stale(stage):
+            return {'stage': stage.name, 'status': 'skipped', 'seconds': time.perf_counter() - start, 'peak_rss_mb': None}
+        print(f'[{stage.name}] running: {" ".join(stage.command())}')
+        returncode, peak = run_process(stage.command(), os.path.join(self.log_dir, f'{stage.name}.log'), self.cwd)
+        seconds = time.perf_counter() - start
+        status = 'done' if returncode == 0 else 'failed'
+        if status == 'done':
+            signature = self._signature(stage)
+            with self._lock:
+                self.state['stages'][stage.name] = signature
+            self._save_state()
+        print(f'[{stage.name}] {status} in {seconds:.1f}s' + (f', peak RSS {peak:.0f} MB' if peak is not None else ''))
+        return {'stage': stage.name, 'status': status, 'returncode': returncode, 'seconds': seconds, 'peak_rss_mb': peak}
+
+    def run(self, targets=None, force=(), workers=2):
+        """Run `targets` (default: all stages) and their upstream stages; return the report rows.
+
+        `force` names stages to re-run regardless of their inputs. A failed
+        stage blocks everything downstream of it.
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        selected = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.upstream[name])
+
+        report = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while len(report) < len(selected):
+                for name in sorted(selected):
+                    if name in report or name in running.values():
+                        continue
+                    upstream = [report.get(dependency) for dependency in self.upstream[name]]
+                    if any(row is not None and row['status'] in ('failed', 'blocked') for row in upstream):
+                        report[name] = {'stage': name, 'status': 'blocked', 'seconds': 0.0, 'peak_rss_mb': None}
+                    elif all(row is not None for row in upstream):
+                        running[pool.submit(self._run_stage, self.stages[name], name in force)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report[running.pop(future)] = future.result()
+        return [report[name] for name in self.stages if name in report]
+
+def write_report(report, path, total_seconds=None):
+    """Write the run report as JSON."""
+    with open(path, 'w') as file:
+        json.dump({'finished': time.strftime('%Y-%m-%d %H:%M:%S'), 'total_seconds': total_seconds, 'stages': report}, file, indent=1)
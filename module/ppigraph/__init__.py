@@ -0,0 +1,3 @@
+from ._core import *
+from .gcn import *
+from .sgc import *
\ No newline at end of file
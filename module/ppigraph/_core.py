@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+class PPIGraph:
+    """A PPI graph built straight from two symbol columns.
+
+    Nodes are numbered in order of first appearance (symA, symB of row 0,
+    then row 1, ...), like `nx.from_pandas_edgelist`. `edge_index` holds
+    each undirected edge once, from the earlier node to the later one,
+    which is the direction `G.edges()` reports them in.
+    """
+
+    def __init__(self, nodes, edge_index):
+        self.nodes = pd.Index(nodes, dtype=object)
+        self.edge_index = edge_index
+
+    @classmethod
+    def from_edges(cls, sym_a, sym_b):
+        sym_a = np.asarray(sym_a, dtype=object)
+        sym_b = np.asarray(sym_b, dtype=object)
+        # 交替排列 A/B 后编码, 节点编号即首次出现的顺序
+        codes, nodes = pd.factorize(np.column_stack([sym_a, sym_b]).ravel())
+        codes = codes.reshape(-1, 2).astype(np.int64)
+        edges = np.unique(np.sort(codes, axis=1), axis=0)
+        return cls(nodes, np.ascontiguousarray(edges.T))
+
+    @classmethod
+    def from_frame(cls, ppi:pd.DataFrame, source='symA', target='symB'):
+        return cls.from_edges(ppi[source].to_numpy(), ppi[target].to_numpy())
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return self.edge_index.shape[1]
+
+    def features(self, embeddings:dict, dim):
+        """(num_nodes, dim) float32 matrix of `embeddings`, zeros for missing nodes."""
+        keys = pd.Index(list(embeddings.keys()), dtype=object)
+        rows = keys.get_indexer(self.nodes)
+        found = rows >= 0
+        x = np.zeros((self.num_nodes, dim), dtype=np.float32)
+        if found.any():
+            matrix = np.asarray(list(embeddings.values()), dtype=np.float32)
+            x[found] = matrix[rows[found]]
+        return x
+
+    def adjacency(self, symmetric=False):
+        """GCN-normalized adjacency with self loops as a CSR matrix (targets x sources).
+
+        `A @ x` is one `GCNConv` propagation over `edge_index` (messages go
+        from the first to the second row, degrees are counted on the target).
+        With `symmetric=True` every edge is used in both directions.
+        """
+        row, col = self.edge_index
+        if symmetric:
+            row, col = np.concatenate([row, col]), np.concatenate([col, row])
+        # GCNConv 只给没有自环的节点补自环, 已有自环的边保留原样
+        loops = np.arange(self.num_nodes)
+        has_loop = np.zeros(self.num_nodes, dtype=bool)
+        has_loop[row[row == col]] = True
+        row = np.concatenate([row, loops[~has_loop]])
+        col = np.concatenate([col, loops[~has_loop]])
+        deg = np.bincount(col, minlength=self.num_nodes).astype(np.float32)
+        deg_inv_sqrt = np.zeros_like(deg)
+        deg_inv_sqrt[deg > 0] = deg[deg > 0] ** -0.5
+        weight = deg_inv_sqrt[row] * deg_inv_sqrt[col]
+        return sp.csr_matrix((weight, (col, row)), shape=(self.num_nodes, self.num_nodes), dtype=np.float32)
+
+    def embeddings_dict(self, node_embeddings):
+        """{symbol: vector}, the layout of the notebook's `ppi_embeddings`."""
+        return {node: node_embeddings[i] for i, node in enumerate(self.nodes)}
+
+def sample_negative_edges(num_nodes, num_edges, rng=None):
+    """One batched draw of `num_edges` uniform random node pairs, (2, num_edges)."""
+    rng = np.random.default_rng() if rng is None else rng
+    dtype = np.int32 if num_nodes < np.iinfo(np.int32).max else np.int64
+    return rng.integers(0, num_nodes, size=(2, num_edges), dtype=dtype)
+
+def sample_blocks(adjacency:sp.csr_matrix, seeds, fanouts, rng=None):
+    """Neighbor-sampled propagation blocks for mini-batch GCN training.
+
+    Returns (input_nodes, blocks): `blocks[l]` is a CSR matrix from the
+    nodes of layer l to those of layer l + 1, the last layer's rows are
+    `seeds`. Every node keeps its self loop and up to `fanouts[l]` other
+    in-neighbors (None keeps all); sampled weights are rescaled by
+    degree / sampled so the aggregation stays unbiased. With all fanouts
+    None the blocks reproduce the full propagation exactly.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    indptr, indices, data = adjacency.indptr, adjacency.indices, adjacency.data
+    blocks = []
+    dst = np.asarray(seeds, dtype=np.int64)
+    for fanout in reversed(fanouts):
+        starts, stops = indptr[dst], indptr[dst + 1]
+        counts = stops - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        block_rows = np.repeat(np.arange(len(dst)), counts)
+        src = indices[positions]
+        weight = data[positions]
+        if fanout is not None:
+            # 自环始终保留, 其余邻居每个节点最多采样 fanout 个
+            is_loop = src == dst[block_rows]
+            loops = np.bincount(block_rows[is_loop], minlength=len(dst))
+            neighbors = counts - loops
+            priority = rng.random(len(src))
+            priority[is_loop] = -1.0
+            order = np.lexsort((priority, block_rows))
+            rank = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+            keep = np.zeros(len(src), dtype=bool)
+            keep[order] = rank < fanout + loops[block_rows[order]]
+            sampled = np.minimum(neighbors, fanout)
+            scale = np.ones(len(dst), dtype=np.float32)
+            scale[sampled > 0] = neighbors[sampled > 0] / sampled[sampled > 0]
+            weight = np.where(is_loop, weight, weight * scale[block_rows])
+            src, weight, block_rows = src[keep], weight[keep], block_rows[keep]
+        # 本层的输出节点排在输入节点最前面
+        src_nodes = np.concatenate([dst, np.setdiff1d(src, dst)])
+        cols = pd.Index(src_nodes).get_indexer(src)
+        blocks.append(sp.csr_matrix((weight.astype(np.float32), (block_rows, cols)), shape=(len(dst), len(src_nodes))))
+        dst = src_nodes
+    return dst, blocks[::-1]
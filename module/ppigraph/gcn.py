@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import torch
+import torch.nn.functional as F
+
+import instrument
+
+from ._core import sample_blocks, sample_negative_edges
+
+def to_torch_sparse(matrix:sp.spmatrix, device='cpu'):
+    """scipy sparse matrix -> coalesced torch sparse COO tensor."""
+    coo = matrix.tocoo()
+    indices = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+    values = torch.from_numpy(coo.data.astype(np.float32))
+    return torch.sparse_coo_tensor(indices, values, coo.shape).coalesce().to(device)
+
+class SparseGCN(torch.nn.Module):
+    """Two-layer GCN (same layers as the notebook's PPIGCN) on a precomputed adjacency.
+
+    `forward(x, adj)` takes either one normalized adjacency for the whole
+    graph or the two blocks returned by `sample_blocks`.
+    """
+
+    def __init__(self, in_dim, hidden_dim, out_dim, dropout=0.5):
+        super().__init__()
+        self.lin1 = torch.nn.Linear(in_dim, hidden_dim, bias=False)
+        self.lin2 = torch.nn.Linear(hidden_dim, out_dim, bias=False)
+        self.bias1 = torch.nn.Parameter(torch.zeros(hidden_dim))
+        self.bias2 = torch.nn.Parameter(torch.zeros(out_dim))
+        self.dropout = dropout
+        # 与 GCNConv 相同的 glorot 初始化
+        torch.nn.init.xavier_uniform_(self.lin1.weight)
+        torch.nn.init.xavier_uniform_(self.lin2.weight)
+
+    def forward(self, x, adj):
+        adjs = adj if isinstance(adj, (list, tuple)) else (adj, adj)
+        h = (torch.sparse.mm(adjs[0], self.lin1(x)) + self.bias1).relu()
+        h = F.dropout(h, p=self.dropout, training=self.training)
+        return torch.sparse.mm(adjs[1], self.lin2(h)) + self.bias2
+
+    @torch.no_grad()
+    def inference(self, x, adjacency:sp.csr_matrix, chunk_size=65536):
+        """Layer-wise full-neighbor embeddings of all nodes, propagated `chunk_size` rows at a time."""
+        self.eval()
+        h = torch.as_tensor(x)
+        for lin, bias, last in ((self.lin1, self.bias1, False), (self.lin2, self.bias2, True)):
+            device = bias.device
+            messages = torch.cat([lin(h[start:start + chunk_size].to(device)).cpu() for start in range(0, len(h), chunk_size)]).numpy()
+            out = np.empty((adjacency.shape[0], messages.shape[1]), dtype=np.float32)
+            for start in range(0, adjacency.shape[0], chunk_size):
+                out[start:start + chunk_size] = adjacency[start:start + chunk_size] @ messages
+            h = torch.from_numpy(out) + bias.cpu()
+            if not last:
+                h = h.relu()
+        return h.numpy()
+
+def link_loss(z, pos_edges, neg_edges):
+    """The notebook's loss: -log σ(z_u·z_v) on edges plus -log(1 - σ(z_u·z_v)) on negatives."""
+    pos_scores = torch.sigmoid((z[pos_edges[0]] * z[pos_edges[1]]).sum(dim=1))
+    neg_scores = torch.sigmoid((z[neg_edges[0]] * z[neg_edges[1]]).sum(dim=1))
+    return -torch.log(pos_scores + 1e-15).mean() - torch.log(1 - neg_scores + 1e-15).mean()
+
+def train_gcn(model, x, adjacency:sp.csr_matrix, edge_index, epochs=100, lr=0.01, batch_size=None,
+              fanouts=(10, 10), seed=0, device='cpu', log_every=10):
+    """Unsupervised link-prediction training of a `SparseGCN`; returns seconds per epoch.
+
+    `batch_size=None` trains full-batch with one sparse product per layer.
+    Otherwise each step takes `batch_size` edges, their negatives and the
+    neighbor-sampled 2-hop blocks of the touched nodes (`fanouts`, None
+    keeps all neighbors), so memory is bounded by the batch, not the graph.
+    Negatives are drawn for the whole epoch in one batch before training.
+    """
+    rng = np.random.default_rng(seed)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    x = torch.as_tensor(x)
+    num_nodes, num_edges = x.shape[0], edge_index.shape[1]
+    if batch_size is None:
+        x_device = x.to(device)
+        adj = to_torch_sparse(adjacency, device)
+        pos_edges = torch.as_tensor(edge_index, dtype=torch.long, device=device)
+
+    epoch_times = []
+    edges_counter = instrument.counter('gcn_edges', 'edges')
+    model.train()
+    for epoch in range(epochs):
+        start_time = time.perf_counter()
+        negatives = sample_negative_edges(num_nodes, num_edges, rng)
+        if batch_size is None:
+            optimizer.zero_grad()
+            z = model(x_device, adj)
+            loss = link_loss(z, pos_edges, torch.as_tensor(negatives, dtype=torch.long, device=device))
+            loss.backward()
+            optimizer.step()
+            epoch_loss = loss.item()
+        else:
+            epoch_loss = 0.0
+            permutation = rng.permutation(num_edges)
+            for start in range(0, num_edges, batch_size):
+                batch = permutation[start:start + batch_size]
+                pos, neg = edge_index[:, batch], negatives[:, batch]
+                seeds = np.unique(np.concatenate([pos.ravel(), neg.ravel()]))
+                input_nodes, blocks = sample_blocks(adjacency, seeds, fanouts, rng)
+                optimizer.zero_grad()
+                z = model(x[input_nodes].to(device), [to_torch_sparse(block, device) for block in blocks])
+                # seeds 已排序, 用 searchsorted 得到边端点在 z 中的行
+                pos = torch.as_tensor(np.searchsorted(seeds, pos), dtype=torch.long, device=device)
+                neg = torch.as_tensor(np.searchsorted(seeds, neg), dtype=torch.long, device=device)
+                loss = link_loss(z, pos, neg)
+                loss.backward()
+                optimizer.step()
+                epoch_loss += loss.item() * len(batch) / num_edges
+        epoch_times.append(time.perf_counter() - start_time)
+        instrument.emit('epoch', stage='gcn', epoch=epoch, loss=epoch_loss, seconds=epoch_times[-1])
+        edges_counter.add(num_edges)
+        if epoch % log_every == 0:
+            print(f"Epoch {epoch}, Loss: {epoch_loss:.4f}, Time: {epoch_times[-1]:.2f}s")
+    print(f"Average epoch time: {np.mean(epoch_times):.2f}s")
+    return epoch_times
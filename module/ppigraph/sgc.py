@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+from ._core import PPIGraph
+
+def graph_fingerprint(graph:PPIGraph):
+    """sha1 of a graph's nodes and edges."""
+    digest = hashlib.sha1('\t'.join(map(str, graph.nodes)).encode('utf-8'))
+    digest.update(np.ascontiguousarray(graph.edge_index, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+def array_fingerprint(x):
+    """sha1 of an array's shape and float32 values."""
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    digest = hashlib.sha1(str(x.shape).encode('utf-8'))
+    digest.update(x.tobytes())
+    return digest.hexdigest()
+
+def propagate_features(adjacency:sp.csr_matrix, x, k=2):
+    """Â^k X with k sparse products."""
+    x = np.asarray(x, dtype=np.float32)
+    for _ in range(k):
+        x = adjacency @ x
+    return x
+
+def pca_projection(x, dim):
+    """Top `dim` principal directions of `x`, as (mean, components) for (x - mean) @ components."""
+    mean = x.mean(axis=0)
+    # 特征维度远小于节点数, 对协方差矩阵做特征分解即可
+    centered = x - mean
+    covariance = centered.T @ centered
+    values, vectors = np.linalg.eigh(covariance.astype(np.float64))
+    components = vectors[:, np.argsort(values)[::-1][:dim]]
+    # 固定符号, 使结果可复现
+    components *= np.sign(components[np.abs(components).argmax(axis=0), np.arange(components.shape[1])])
+    return mean, components.astype(np.float32)
+
+def sgc_embeddings(graph:PPIGraph, x, k=2, dim=None, symmetric=True, cache_dir=None):
+    """SGC-style PPI embeddings: Â^k X, optionally projected to `dim` with PCA.
+
+    Â is the self-looped, symmetrically normalized adjacency (every edge
+    used in both directions unless `symmetric=False`). With `cache_dir`
+    the result is saved as `<cache_dir>/<key>.npz`, keyed by the graph,
+    the input features and the parameters, and loaded from there on
+    later calls. Returns a (num_nodes, dim) float32 matrix in node order.
+    """
+    path = None
+    if cache_dir is not None:
+        params = json.dumps({'graph': graph_fingerprint(graph), 'x': array_fingerprint(x), 'k': k, 'dim': dim, 'symmetric': symmetric}, sort_keys=True)
+        path = os.path.join(cache_dir, hashlib.sha1(params.encode('utf-8')).hexdigest() + '.npz')
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return data['embeddings']
+
+    embeddings = propagate_features(graph.adjacency(symmetric=symmetric), x, k)
+    if dim is not None and dim < embeddings.shape[1]:
+        mean, components = pca_projection(embeddings, dim)
+        embeddings = (embeddings - mean) @ components
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path + '.tmp.npz', embeddings=embeddings, nodes=np.asarray(graph.nodes, dtype=str))
+        os.replace(path + '.tmp.npz', path)
+    return embeddings
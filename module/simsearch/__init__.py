@@ -0,0 +1,2 @@
+from ._core import *
+from .ivf import *
\ No newline at end of file
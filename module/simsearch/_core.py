@@ -0,0 +1,165 @@
+import os
+import json
+
+import numpy as np
+
+def normalize(vectors):
+    """Rows scaled to unit L2 norm as float32 (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1).astype(np.float32)
+
+def embedding_matrix(embeddings):
+    """{key: vector} -> (keys array, float32 matrix), skipping vectors of another length than the first."""
+    if len(embeddings) == 0:
+        return np.empty(0, dtype=object), np.empty((0, 0), dtype=np.float32)
+    dim = len(next(iter(embeddings.values())))
+    keys = [key for key, vector in embeddings.items() if len(vector) == dim]
+    matrix = np.empty((len(keys), dim), dtype=np.float32)
+    for i, key in enumerate(keys):
+        matrix[i] = embeddings[key]
+    return np.array(keys, dtype=object), matrix
+
+def merge_topk(best_scores, best_ids, scores, ids, k):
+    """Merge candidate (scores, ids) into the running top-k of each row; rows stay unsorted."""
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        ids = np.take_along_axis(ids, part, axis=1) if ids.ndim == 2 else ids[part]
+    elif ids.ndim == 1:
+        ids = np.broadcast_to(ids, scores.shape)
+    scores = np.concatenate([best_scores, scores], axis=1)
+    ids = np.concatenate([best_ids, ids], axis=1)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, part, axis=1), np.take_along_axis(ids, part, axis=1)
+
+def sort_topk(scores, ids):
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+def kmeans(x, n_clusters, iters=20, sample=65536, seed=0):
+    """Lloyd's k-means on at most `sample` rows of `x`; returns float32 centroids.
+
+    Assignment uses argmax(x·c - ||c||²/2), the L2 nearest centroid, so
+    every step is one matrix product; empty clusters are re-seeded from
+    random rows.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    if len(x) > sample:
+        x = x[rng.choice(len(x), sample, replace=False)]
+    if len(x) < n_clusters:
+        raise ValueError(f'k-means needs at least {n_clusters} rows, got {len(x)}')
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        assignment = assign(x, centroids)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        empty = counts == 0
+        # 按簇排序后用 reduceat 分段求和, 比 np.add.at 快得多
+        order = np.argsort(assignment, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[~empty]
+        centroids[~empty] = np.add.reduceat(x[order], starts, axis=0) / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return centroids
+
+def assign(x, centroids, block_size=65536):
+    """Index of the nearest centroid (L2) of each row, computed in blocks."""
+    half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), block_size):
+        out[start:start + block_size] = np.argmax(x[start:start + block_size] @ centroids.T - half_norms, axis=1)
+    return out
+
+class ExactIndex:
+    """Exact top-k cosine search over unit-normalized vectors.
+
+    Scores are computed as BLAS products of `query_batch` queries against
+    `block_size` database rows at a time, so memory stays at
+    query_batch x block_size floats whatever the database size.
+    """
+
+    kind = 'exact'
+
+    def __init__(self, vectors, keys=None, block_size=8192, query_batch=1024):
+        self.vectors = normalize(vectors)
+        self.keys = np.arange(len(self.vectors)) if keys is None else np.asarray(keys, dtype=object)
+        self.block_size = block_size
+        self.query_batch = query_batch
+
+    @classmethod
+    def from_embeddings(cls, embeddings, **kwargs):
+        keys, matrix = embedding_matrix(embeddings)
+        return cls(matrix, keys, **kwargs)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=10, exclude=None):
+        """(scores, ids) of the `k` most similar rows per query, best first.
+
+        `exclude` gives one database row per query to leave out (e.g. the
+        query itself), -1 for none. Missing results have id -1.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        k = min(k, len(self.vectors) - (exclude is not None))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for qs in range(0, len(queries), self.query_batch):
+            q = queries[qs:qs + self.query_batch]
+            best_scores, best_ids = scores[qs:qs + len(q)], ids[qs:qs + len(q)]
+            for start in range(0, len(self.vectors), self.block_size):
+                block = q @ self.vectors[start:start + self.block_size].T
+                block_ids = np.arange(start, start + block.shape[1])
+                if exclude is not None:
+                    rows = np.flatnonzero((exclude[qs:qs + len(q)] >= start) & (exclude[qs:qs + len(q)] < start + block.shape[1]))
+                    block[rows, exclude[qs:qs + len(q)][rows] - start] = -np.inf
+                best_scores, best_ids = merge_topk(best_scores, best_ids, block, block_ids, k)
+            scores[qs:qs + len(q)], ids[qs:qs + len(q)] = sort_topk(best_scores, best_ids)
+        return scores, np.where(np.isfinite(scores), ids, -1)
+
+    def neighbors(self, k=10):
+        """Top-k neighbours of every database row, excluding itself."""
+        return self.search(self.vectors, k, exclude=np.arange(len(self.vectors)))
+
+    def nbytes(self):
+        return self.vectors.nbytes
+
+    def _arrays(self):
+        return {'vectors': self.vectors}
+
+    def _meta(self):
+        return {'block_size': self.block_size, 'query_batch': self.query_batch}
+
+    def save(self, path):
+        """Write the index to one .npz file (keys, arrays and settings)."""
+        meta = dict(self._meta(), kind=self.kind, key_type='int' if np.issubdtype(np.asarray(self.keys.tolist()).dtype, np.integer) else 'str')
+        keys = np.asarray(self.keys.tolist(), dtype=np.int64 if meta['key_type'] == 'int' else str)
+        np.savez(path + '.tmp.npz', meta=np.array(json.dumps(meta)), keys=keys, **self._arrays())
+        os.replace(path + '.tmp.npz', path)
+
+    @classmethod
+    def _restore(cls, keys, arrays, meta):
+        return cls(arrays['vectors'], keys, **meta)
+
+def load_index(path):
+    """Load an ExactIndex or IVFIndex written by `save`."""
+    from .ivf import IVFIndex
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        keys = data['keys'].astype(np.int64 if meta['key_type'] == 'int' else object)
+        arrays = {name: data[name] for name in data.files if name not in ('meta', 'keys')}
+    cls = {'exact': ExactIndex, 'ivf': IVFIndex}[meta.pop('kind')]
+    meta.pop('key_type')
+    return cls._restore(keys, arrays, meta)
+
+def candidate_pairs(ids, include_self=False):
+    """Unique unordered pairs (a < b) from a neighbour table `ids` (row i -> its neighbours)."""
+    rows = np.repeat(np.arange(len(ids)), ids.shape[1])
+    cols = ids.reshape(-1)
+    keep = cols >= 0
+    if not include_self:
+        keep &= cols != rows
+    a, b = np.minimum(rows[keep], cols[keep]), np.maximum(rows[keep], cols[keep])
+    pairs = np.unique(np.stack([a, b], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
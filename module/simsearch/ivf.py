@@ -0,0 +1,143 @@
+import numpy as np
+
+from ._core import ExactIndex, normalize, kmeans, assign, merge_topk, sort_topk
+
+class IVFIndex(ExactIndex):
+    """Approximate cosine search: inverted lists over k-means cells, optionally product-quantized.
+
+    Vectors are normalized and assigned to `nlist` coarse centroids; a
+    query only scores the rows of its `nprobe` closest cells. With
+    `pq_m` set, each row stores `pq_m` one-byte codes of its residual to
+    the cell centroid instead of the float vector (d * 4 / pq_m times
+    smaller), and scores are q·c + sum of per-subspace lookup tables.
+    Queries are grouped by cell so each probed list is scored with one
+    matrix product.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, vectors, keys=None, nlist=None, nprobe=8, pq_m=None, pq_bits=8, iters=20, seed=0,
+                 block_size=8192, query_batch=1024, _state=None):
+        self.keys = np.arange(len(vectors) if _state is None else len(_state['ids'])) if keys is None else np.asarray(keys, dtype=object)
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self.block_size = block_size
+        self.query_batch = query_batch
+        if _state is not None:
+            self.__dict__.update(_state)
+            return
+
+        vectors = normalize(vectors)
+        dim = vectors.shape[1]
+        self.nlist = nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        self.centroids = kmeans(vectors, self.nlist, iters=iters, seed=seed)
+        lists = assign(vectors, self.centroids)
+        self.ids = np.argsort(lists, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=self.nlist))])
+        if pq_m is None:
+            self.vectors = vectors[self.ids]
+            return
+        if dim % pq_m:
+            raise ValueError(f'pq_m={pq_m} must divide the dimension {dim}')
+        residuals = vectors[self.ids] - self.centroids[lists[self.ids]]
+        sub = dim // pq_m
+        self.codebooks = np.stack([kmeans(residuals[:, j * sub:(j + 1) * sub], 2 ** pq_bits, iters=iters, seed=seed + j)
+                                   for j in range(pq_m)])
+        self.codes = np.stack([assign(residuals[:, j * sub:(j + 1) * sub], self.codebooks[j]) for j in range(pq_m)], axis=1)
+        self.codes = self.codes.astype(np.uint8 if pq_bits <= 8 else np.uint16)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _probe(self, queries):
+        """The `nprobe` cells closest to each query (unordered)."""
+        nprobe = min(self.nprobe, self.nlist)
+        scores = queries @ self.centroids.T - 0.5 * np.einsum('ij,ij->i', self.centroids, self.centroids)
+        return np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe] if nprobe < self.nlist else np.broadcast_to(np.arange(self.nlist), scores.shape)
+
+    def _score_list(self, cell, q, tables):
+        start, stop = self.offsets[cell], self.offsets[cell + 1]
+        if self.pq_m is None:
+            return q @ self.vectors[start:stop].T
+        # q·x ≈ q·c + Σ_j q_j·codebook_j[code_j]
+        codes = self.codes[start:stop]
+        scores = np.repeat((q @ self.centroids[cell])[:, None], stop - start, axis=1)
+        for j in range(self.pq_m):
+            scores += tables[:, j, codes[:, j]]
+        return scores
+
+    def search(self, queries, k=10, exclude=None):
+        """(scores, ids) of the `k` best rows per query among its probed cells, best first.
+
+        Same interface as ExactIndex.search; with PQ the scores are the
+        quantized estimates.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        k = min(k, len(self) - (exclude is not None))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for qs in range(0, len(queries), self.query_batch):
+            q = queries[qs:qs + self.query_batch]
+            tables = None
+            if self.pq_m is not None:
+                sub = q.shape[1] // self.pq_m
+                tables = np.einsum('qmd,mcd->qmc', q.reshape(len(q), self.pq_m, sub), self.codebooks)
+            probe = self._probe(q)
+            best_scores, best_ids = scores[qs:qs + len(q)].copy(), ids[qs:qs + len(q)].copy()
+            # 按列表分组: 探查同一列表的查询一起做一次矩阵乘法
+            query_rows = np.repeat(np.arange(len(q)), probe.shape[1])
+            cells = probe.reshape(-1)
+            order = np.argsort(cells, kind='stable')
+            bounds = np.flatnonzero(np.diff(cells[order])) + 1
+            for group in np.split(order, bounds):
+                cell, rows = cells[group[0]], query_rows[group]
+                if self.offsets[cell] == self.offsets[cell + 1]:
+                    continue
+                list_ids = self.ids[self.offsets[cell]:self.offsets[cell + 1]]
+                list_scores = self._score_list(cell, q[rows], None if tables is None else tables[rows])
+                if exclude is not None:
+                    mask = list_ids[None, :] == exclude[qs:qs + len(q)][rows][:, None]
+                    list_scores = np.where(mask, -np.inf, list_scores)
+                best_scores[rows], best_ids[rows] = merge_topk(best_scores[rows], best_ids[rows], list_scores.astype(np.float32), list_ids, k)
+            scores[qs:qs + len(q)], ids[qs:qs + len(q)] = sort_topk(best_scores, best_ids)
+        return scores, np.where(np.isfinite(scores), ids, -1)
+
+    def neighbors(self, k=10):
+        """Approximate top-k neighbours of every database row, excluding itself."""
+        return self.search(self.reconstruct(), k, exclude=np.arange(len(self)))
+
+    def reconstruct(self):
+        """Database vectors in original row order (PQ: their quantized approximation)."""
+        out = np.empty((len(self), self.centroids.shape[1]), dtype=np.float32)
+        if self.pq_m is None:
+            out[self.ids] = self.vectors
+            return out
+        lists = np.repeat(np.arange(self.nlist), np.diff(self.offsets))
+        sub = out.shape[1] // self.pq_m
+        approx = self.centroids[lists].copy()
+        for j in range(self.pq_m):
+            approx[:, j * sub:(j + 1) * sub] += self.codebooks[j][self.codes[:, j]]
+        out[self.ids] = approx
+        return out
+
+    def nbytes(self):
+        stored = self.vectors.nbytes if self.pq_m is None else self.codes.nbytes + self.codebooks.nbytes
+        return stored + self.centroids.nbytes + self.ids.nbytes + self.offsets.nbytes
+
+    def _arrays(self):
+        arrays = {'centroids': self.centroids, 'ids': self.ids, 'offsets': self.offsets}
+        if self.pq_m is None:
+            arrays['vectors'] = self.vectors
+        else:
+            arrays.update(codebooks=self.codebooks, codes=self.codes)
+        return arrays
+
+    def _meta(self):
+        return {'nlist': int(self.nlist), 'nprobe': self.nprobe, 'pq_m': self.pq_m, 'pq_bits': self.pq_bits,
+                'block_size': self.block_size, 'query_batch': self.query_batch}
+
+    @classmethod
+    def _restore(cls, keys, arrays, meta):
+        state = dict(arrays, nlist=meta.pop('nlist'))
+        return cls(None, keys, _state=state, **meta)
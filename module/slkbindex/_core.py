@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+SLKB_COLUMNS = ['cell_line_origin', 'gene_1', 'gene_2', 'SL_or_not']
+
+class SLPairTable:
+    """Integer-coded SLKB pairs grouped by cell line.
+
+    Rows are sorted by cell line (original order kept inside a cell line),
+    so the rows of cell line `i` are `offsets[i]:offsets[i + 1]`.
+    `gene_a` / `gene_b` index `genes`, `cell_line` indexes `cell_lines`,
+    `label` is 1 for SL and 0 otherwise.
+    """
+
+    def __init__(self, genes, cell_lines, gene_a, gene_b, cell_line, label, offsets):
+        self.genes = np.asarray(genes)
+        self.cell_lines = np.asarray(cell_lines)
+        self.gene_a = gene_a
+        self.gene_b = gene_b
+        self.cell_line = cell_line
+        self.label = label
+        self.offsets = offsets
+        self._cell_line_index = {str(name): i for i, name in enumerate(self.cell_lines)}
+
+    def __len__(self):
+        return len(self.label)
+
+    def counts(self):
+        """{cell line: number of rows}."""
+        return {str(name): int(count) for name, count in zip(self.cell_lines, np.diff(self.offsets))}
+
+    def rows(self, cell_line):
+        """slice of the rows of one cell line."""
+        i = self._cell_line_index[cell_line]
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def cell_line_codes(self, cell_line):
+        """(gene_a, gene_b, label) code arrays of one cell line, as views."""
+        rows = self.rows(cell_line)
+        return self.gene_a[rows], self.gene_b[rows], self.label[rows]
+
+    def to_frame(self, cell_line=None):
+        """Decode (one cell line of) the table back to gene_1 / gene_2 / cell_line_origin / label."""
+        rows = self.rows(cell_line) if cell_line is not None else slice(None)
+        return pd.DataFrame({
+            'cell_line_origin': self.cell_lines[self.cell_line[rows]],
+            'gene_1': self.genes[self.gene_a[rows]],
+            'gene_2': self.genes[self.gene_b[rows]],
+            'label': self.label[rows],
+        })
+
+    def save(self, path):
+        np.savez(path, genes=self.genes, cell_lines=self.cell_lines, gene_a=self.gene_a, gene_b=self.gene_b,
+                 cell_line=self.cell_line, label=self.label, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['genes'], data['cell_lines'], data['gene_a'], data['gene_b'],
+                       data['cell_line'], data['label'], data['offsets'])
+
+def _code_dtype(n):
+    return np.int16 if n < np.iinfo(np.int16).max else np.int32
+
+def index_slkb(sl_data_path, chunksize=200000):
+    """Scan SLKB_rawSL.csv once and return (gene_df, cell_line_df, SLPairTable).
+
+    gene_df and cell_line_df have the same layout as gene_set.csv and
+    cell_line_set.csv.
+    """
+    chunks = []
+    reader = pd.read_csv(sl_data_path, usecols=SLKB_COLUMNS, dtype={column: 'category' for column in SLKB_COLUMNS}, chunksize=chunksize)
+    for chunk in reader:
+        chunks.append(chunk)
+
+    genes = set()
+    cell_lines = set()
+    for chunk in chunks:
+        genes.update(chunk['gene_1'].cat.categories)
+        genes.update(chunk['gene_2'].cat.categories)
+        cell_lines.update(chunk['cell_line_origin'].cat.categories)
+    genes = sorted(genes)
+    cell_lines = sorted(cell_lines)
+
+    gene_dtype = _code_dtype(len(genes))
+    cell_dtype = _code_dtype(len(cell_lines))
+    gene_a = []
+    gene_b = []
+    cell_line = []
+    label = []
+    for chunk in chunks:
+        # 各块的 category 不同, 统一重新编码到排序后的全局编号
+        gene_a.append(pd.Categorical(chunk['gene_1'], categories=genes).codes.astype(gene_dtype))
+        gene_b.append(pd.Categorical(chunk['gene_2'], categories=genes).codes.astype(gene_dtype))
+        cell_line.append(pd.Categorical(chunk['cell_line_origin'], categories=cell_lines).codes.astype(cell_dtype))
+        label.append((chunk['SL_or_not'] == 'SL').to_numpy(dtype=np.int8))
+    gene_a = np.concatenate(gene_a)
+    gene_b = np.concatenate(gene_b)
+    cell_line = np.concatenate(cell_line)
+    label = np.concatenate(label)
+
+    # 缺少细胞系或基因的行不进入 pair 表
+    valid = (cell_line >= 0) & (gene_a >= 0) & (gene_b >= 0)
+    order = np.argsort(cell_line[valid], kind='stable')
+    counts = np.bincount(cell_line[valid], minlength=len(cell_lines))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    table = SLPairTable(genes, cell_lines, gene_a[valid][order], gene_b[valid][order],
+                        cell_line[valid][order], label[valid][order], offsets)
+
+    gene_df = pd.DataFrame(genes, columns=['gene_symbol'], dtype='string')
+    cell_line_df = pd.DataFrame({
+        'cell_line_origin': cell_lines,
+        'cell_line_gene_num': np.bincount(cell_line[cell_line >= 0], minlength=len(cell_lines)),
+    }).astype({'cell_line_origin': 'string', 'cell_line_gene_num': 'int'})
+    return gene_df, cell_line_df, table
@@ -0,0 +1,87 @@
+import numpy as np
+import torch
+
+def balance_indices(labels, max_neg_ratio=3.0, min_pos_samples=5, random_state=42):
+    """Positions kept by the notebook's `balance_dataset`, in its row order.
+
+    All positives first, then at most `max_neg_ratio` negatives per
+    positive drawn like `DataFrame.sample(n, random_state=random_state)`.
+    Every position is kept when there are fewer than `min_pos_samples`
+    positives or the result would hold a single class.
+    """
+    labels = np.asarray(labels)
+    positives = np.flatnonzero(labels == 1)
+    negatives = np.flatnonzero(labels == 0)
+    if len(positives) < min_pos_samples:
+        return np.arange(len(labels))
+    n_neg = min(len(negatives), int(len(positives) * max_neg_ratio))
+    if n_neg == 0:
+        return np.arange(len(labels))
+    # 与 DataFrame.sample 相同: RandomState(random_state).choice(n, size, replace=False)
+    sampled = negatives[np.random.RandomState(random_state).choice(len(negatives), size=n_neg, replace=False)]
+    return np.concatenate([positives, sampled])
+
+def oversample_indices(labels, factor=3, index=None):
+    """`index` (default all positions) followed by its positive entries repeated `factor` times.
+
+    Same rows and order as the notebook's `oversample_positive_samples`
+    with `factor=3`, without copying any features.
+    """
+    labels = np.asarray(labels)
+    index = np.arange(len(labels)) if index is None else np.asarray(index)
+    positives = index[labels[index] == 1]
+    return np.concatenate([index, np.tile(positives, factor)])
+
+def oversample_weights(labels, factor=3):
+    """Per-sample weights giving positives `1 + factor` times the draw probability, for WeightedRandomSampler."""
+    labels = np.asarray(labels)
+    return np.where(labels == 1, 1.0 + factor, 1.0)
+
+class IndexedTensorDataset(torch.utils.data.Dataset):
+    """TensorDataset over `tensors[index]` without materializing the gathered rows."""
+
+    def __init__(self, *tensors, index=None):
+        self.tensors = tensors
+        self.index = torch.arange(len(tensors[0])) if index is None else torch.as_tensor(np.asarray(index), dtype=torch.long)
+        self.index = self.index.to(tensors[0].device)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        row = self.index[i]
+        return tuple(tensor[row] for tensor in self.tensors)
+
+class IndexBatches:
+    """Batches of an `IndexedTensorDataset`, one gather per batch.
+
+    Yields the same batches as `DataLoader(dataset, batch_size, shuffle,
+    drop_last)` would (with the default sampler and no workers), and
+    draws from the global torch RNG in the same way, so swapping it in
+    leaves training reproducible bit for bit.
+    """
+
+    def __init__(self, dataset:IndexedTensorDataset, batch_size=32, shuffle=False, drop_last=False):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+
+    def __len__(self):
+        n = len(self.dataset)
+        return n // self.batch_size if self.drop_last else (n + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        n = len(self.dataset)
+        # DataLoader 每次迭代先取一个 worker base seed, RandomSampler 再取一个种子生成排列
+        torch.empty((), dtype=torch.int64).random_()
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(int(torch.empty((), dtype=torch.int64).random_().item()))
+            order = torch.randperm(n, generator=generator).to(self.dataset.index.device)
+        else:
+            order = None
+        stop = n - n % self.batch_size if self.drop_last else n
+        for start in range(0, stop, self.batch_size):
+            positions = self.dataset.index[start:start + self.batch_size] if order is None else self.dataset.index[order[start:start + self.batch_size]]
+            yield tuple(tensor[positions] for tensor in self.dataset.tensors)